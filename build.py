@@ -55,6 +55,11 @@ options = [
     '--noconfirm'
 ]
 
+# 随程序发布的本地字体目录（可选，包含 fonts.json 和字体文件）
+font_dir = 'fonts'
+if os.path.isdir(font_dir):
+    options += ['--add-data', f'{font_dir}{os.pathsep}resources/fonts']
+
 def main():
     # 检查图标文件是否存在
     if not os.path.exists(icon_file):
@@ -1,7 +1,20 @@
+import collections
+import concurrent.futures
+import functools
+import hashlib
+import json
 import logging
+import mmap
+import queue
 import sys
 import os
+import re
+import shutil
+import sqlite3
+import time
+import threading
 import traceback
+import urllib.request
 from PyQt5.QtCore import (
     QUrl,
     Qt,
@@ -12,6 +25,12 @@ from PyQt5.QtCore import (
     QPropertyAnimation,
     QEasingCurve,
     QByteArray,
+    QEvent,
+    QObject,
+    QCoreApplication,
+    QIODevice,
+    pyqtSignal,
+    pyqtProperty,
 )
 from PyQt5.QtWidgets import (
     QApplication,
@@ -25,12 +44,26 @@ from PyQt5.QtWidgets import (
     QStyle,
     QStyleOption,
     QStylePainter,
+    QGraphicsOpacityEffect,
+    QShortcut,
+    QLineEdit,
+    QListWidget,
+    QListWidgetItem,
+    QStackedLayout,
 )
 from PyQt5.QtWebEngineWidgets import (
     QWebEngineView,
     QWebEngineProfile,
     QWebEnginePage,
     QWebEngineSettings,
+    QWebEngineScript,
+)
+from PyQt5.QtWebEngineCore import (
+    QWebEngineUrlRequestInterceptor,
+    QWebEngineUrlRequestInfo,
+    QWebEngineUrlRequestJob,
+    QWebEngineUrlScheme,
+    QWebEngineUrlSchemeHandler,
 )
 from PyQt5.QtGui import (
     QIcon,
@@ -42,17 +75,153 @@ from PyQt5.QtGui import (
     QPalette,
     QFontDatabase,
     QPixmap,
+    QImage,
     QFont,
     QKeySequence,
 )
 from PyQt5.QtSvg import QSvgWidget
+from PyQt5 import sip
+
+# 应用级样式表：所有控件样式集中于此，启动时通过 app.setStyleSheet 设置一次，
+# 避免每个按钮各自解析一份样式表
+APP_STYLESHEET = """
+    #contentFrame {
+        background-color: white;
+        border-radius: 8px;
+        border: 1px solid #e0e0e0;
+    }
+    QSizeGrip {
+        background-color: transparent;
+    }
+
+    /* 隐藏滚动条但保留滚动功能 */
+    QWebEngineView {
+        border: none;
+    }
+    QWebEngineView QScrollBar:vertical {
+        width: 0px;
+    }
+    QWebEngineView QScrollBar:horizontal {
+        height: 0px;
+    }
+
+    /* 标题栏 */
+    Win11TitleBar {
+        background-color: transparent;
+        border: none;
+    }
+    #titleLabel {
+        color: #1a1a1a;
+        font-family: 'Segoe UI', sans-serif;
+        font-size: 10pt;
+        padding: 0 8px;
+        background-color: transparent;
+        border-radius: 4px;
+    }
+
+    /* 导航按钮与窗口控制按钮 */
+    #navButton, #titleButton, #closeButton {
+        color: #1a1a1a;
+        background-color: transparent;
+        border: none;
+        border-radius: 4px;
+        font-family: 'Segoe UI', sans-serif;
+        font-size: 10pt;
+    }
+    #navButton:hover, #titleButton:hover {
+        background-color: rgba(0, 0, 0, 0.08);
+    }
+    #navButton:pressed, #titleButton:pressed {
+        background-color: rgba(0, 0, 0, 0.12);
+    }
+    #navButton:disabled {
+        color: #a0a0a0;
+    }
+    #closeButton:hover {
+        background-color: #e81123;
+        color: white;
+    }
+    #closeButton:pressed {
+        background-color: #c41021;
+    }
+
+    /* 章节快速跳转面板 */
+    #quickJumpPalette {
+        background-color: white;
+        border: 1px solid #e0e0e0;
+        border-radius: 8px;
+    }
+    #quickJumpBook {
+        color: #606060;
+        font-family: 'Segoe UI', sans-serif;
+        font-size: 9pt;
+    }
+    #quickJumpInput {
+        color: #1a1a1a;
+        border: 1px solid #d0d0d0;
+        border-radius: 4px;
+        padding: 4px 6px;
+        font-size: 10pt;
+    }
+    #quickJumpResults {
+        border: none;
+        font-size: 10pt;
+    }
+    #quickJumpResults::item:selected {
+        background-color: rgba(0, 120, 215, 0.12);
+        color: #1a1a1a;
+    }
+
+    /* 书架浮层 */
+    #bookshelfPanel {
+        background-color: rgba(255, 255, 255, 0.97);
+        border: 1px solid #e0e0e0;
+        border-radius: 8px;
+    }
+    #bookshelfHeader {
+        color: #1a1a1a;
+        font-family: 'Segoe UI', sans-serif;
+        font-size: 11pt;
+    }
+    #bookshelfStatus {
+        color: #606060;
+        font-size: 9pt;
+    }
+    #bookshelfList {
+        border: none;
+        background-color: transparent;
+        font-size: 9pt;
+    }
+    #bookshelfList::item:selected {
+        background-color: rgba(0, 120, 215, 0.12);
+        color: #1a1a1a;
+    }
+
+    /* 网络采集摘要浮层 */
+    #networkSummaryPanel {
+        background-color: rgba(255, 255, 255, 0.96);
+        border: 1px solid #e0e0e0;
+        border-radius: 8px;
+    }
+    #networkSummaryLabel {
+        color: #1a1a1a;
+        font-family: Consolas, 'Courier New', monospace;
+        font-size: 9pt;
+    }
+"""
+
 
 # 解决链接在新窗口打开的问题
 class CustomWebEnginePage(QWebEnginePage):
     def __init__(self, profile, parent=None):
         super().__init__(profile, parent)
+        # 导航拦截回调 (page, url, type) -> bool，返回 False 时取消导航
+        self.navigation_filter = None
 
     def acceptNavigationRequest(self, url, type, isMainFrame):
+        if isMainFrame and self.navigation_filter is not None:
+            if not self.navigation_filter(self, url, type):
+                return False
         # 强制所有导航请求在当前页面打开
         return True
 
@@ -75,77 +244,107 @@ class Win11TitleBar(QWidget):
         # 设置标题栏高度（Win11 标题栏标准高度）
         self.setFixedHeight(32)
 
-        # 创建主布局（水平布局）
-        self.main_layout = QHBoxLayout(self)
-        self.main_layout.setContentsMargins(8, 0, 8, 0)  # 调整边距以容纳新按钮
-        self.main_layout.setSpacing(4)  # 按钮间距
+        # 所有按钮放在一个容器中，叠放在标题之上；悬停显示/隐藏时只改变
+        # 容器的不透明度（一个合成层），不逐个切换按钮的可见性，也不重新布局
+        self.controls = QWidget(self)
+        controls_layout = QHBoxLayout(self.controls)
+        controls_layout.setContentsMargins(8, 0, 8, 0)  # 调整边距以容纳新按钮
+        controls_layout.setSpacing(4)  # 按钮间距
 
         # 创建导航按钮（前进、后退）
         self.back_btn = self.create_nav_button("←")  # 后退按钮
         self.forward_btn = self.create_nav_button("→")  # 前进按钮
         # 添加刷新按钮
         self.refresh_btn = self.create_nav_button("↻")  # 刷新按钮
+        # 章节快速跳转按钮
+        self.jump_btn = self.create_nav_button("☰")
+        self.jump_btn.setToolTip("章节跳转 (Ctrl+G)")
+        # 书架按钮
+        self.shelf_btn = self.create_nav_button("▤")
+        self.shelf_btn.setToolTip("书架 (Ctrl+B)")
 
         # 添加导航按钮到布局
-        self.main_layout.addWidget(self.back_btn)
-        self.main_layout.addWidget(self.forward_btn)
-        self.main_layout.addWidget(self.refresh_btn)  # 添加刷新按钮
-
-        # 窗口标题标签（调整样式使其与导航按钮对齐）
-        self.title = QLabel("OnlineReading")
-        self.title.setObjectName("titleLabel")
-        self.title.setStyleSheet(
-            """
-            #titleLabel {
-                color: #1a1a1a;
-                font-family: 'Segoe UI', sans-serif;
-                font-size: 10pt;
-                padding: 0 8px;
-                background-color: transparent;
-                border-radius: 4px;
-            }
-            Win11TitleBar {
-                background-color: transparent;
-                border: none;
-            }
-        """
-        )
-        self.setAttribute(Qt.WA_TranslucentBackground)  # 允许透明背景
-        self.title.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-        self.main_layout.addWidget(self.title)
-
-        # 添加伸缩项，将窗口控制按钮推到右侧
-        self.main_layout.addStretch(1)
+        nav_buttons = [
+            self.back_btn,
+            self.forward_btn,
+            self.refresh_btn,  # 添加刷新按钮
+            self.jump_btn,
+            self.shelf_btn,
+        ]
+        for btn in nav_buttons:
+            controls_layout.addWidget(btn)
+
+        # 添加伸缩项，将窗口控制按钮推到右侧（中间留给下层的标题）
+        controls_layout.addStretch(1)
 
         # 创建窗口控制按钮
         self.min_btn = self.create_title_button("\u2013")  # 最小化
         self.max_btn = self.create_title_button("\u25a1")  # 最大化
         self.close_btn = self.create_title_button("\u00d7")  # 关闭
+        self.close_btn.setObjectName("closeButton")  # 关闭按钮使用红色悬停样式
 
         # 添加窗口控制按钮到布局
-        self.main_layout.addWidget(self.min_btn)
-        self.main_layout.addWidget(self.max_btn)
-        self.main_layout.addWidget(self.close_btn)
+        title_buttons = [self.min_btn, self.max_btn, self.close_btn]
+        for btn in title_buttons:
+            controls_layout.addWidget(btn)
+
+        # 窗口标题标签（位于按钮容器下层，左右留出按钮的位置使其与导航按钮对齐）
+        title_row = QWidget(self)
+        title_layout = QHBoxLayout(title_row)
+        spacing = controls_layout.spacing()
+        title_layout.setContentsMargins(
+            8 + sum(btn.width() + spacing for btn in nav_buttons),
+            0,
+            8 + sum(btn.width() + spacing for btn in title_buttons),
+            0,
+        )
+        self.title = QLabel("OnlineReading")
+        self.title.setObjectName("titleLabel")
+        self.title.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+        title_layout.addWidget(self.title)
+
+        # 标题和按钮容器叠放，按钮容器在上层
+        self.main_layout = QStackedLayout(self)
+        self.main_layout.setStackingMode(QStackedLayout.StackAll)
+        self.main_layout.addWidget(title_row)
+        self.main_layout.addWidget(self.controls)
+        self.main_layout.setCurrentWidget(self.controls)
 
         # 连接按钮信号
         self.back_btn.clicked.connect(self.parent.go_back)  # 后退功能
         self.forward_btn.clicked.connect(self.parent.go_forward)  # 前进功能
         self.refresh_btn.clicked.connect(self.parent.reload_page)  # 刷新功能
+        self.jump_btn.clicked.connect(self.parent.toggle_quick_jump)  # 章节跳转
+        self.shelf_btn.clicked.connect(self.parent.toggle_bookshelf)  # 书架
         self.min_btn.clicked.connect(self.parent.showMinimized)
         self.max_btn.clicked.connect(self.toggle_maximize)
         self.close_btn.clicked.connect(self.parent.close)
 
-        # 设置标题栏样式为透明
-        self.setStyleSheet(
-            """
-            Win11TitleBar {
-                background-color: transparent;
-                border: none;
-            }
-        """
-        )
+        # 标题栏样式由应用级样式表 APP_STYLESHEET 统一提供
         self.setAttribute(Qt.WA_TranslucentBackground)  # 允许透明背景
 
+        # 标题栏本身透明，内容只有标题和按钮容器两层，各用一个不透明度效果合成。
+        # Qt 不支持嵌套的 QGraphicsEffect，因此整个标题栏的淡入淡出不在标题栏上
+        # 另加效果，而是同时作用于这两层：按钮容器的不透明度为两者之积
+        self.title_effect = QGraphicsOpacityEffect(title_row)
+        title_row.setGraphicsEffect(self.title_effect)
+        self.controls_effect = QGraphicsOpacityEffect(self.controls)
+        self.controls.setGraphicsEffect(self.controls_effect)
+        self.bar_opacity = 1.0  # 整个标题栏
+        self.controls_opacity = 1.0  # 按钮容器（鼠标悬停）
+
+        # 按钮容器随鼠标悬停淡入淡出
+        self.controls_visible = True
+        self.controls_animation = QPropertyAnimation(self, b"controlsOpacity", self)
+        self.controls_animation.setDuration(100)
+        self.controls_animation.setEasingCurve(QEasingCurve.OutQuad)
+
+        # 整个标题栏淡入淡出
+        self.fade_animation = QPropertyAnimation(self, b"barOpacity", self)
+        self.fade_animation.setDuration(150)
+        self.fade_animation.setEasingCurve(QEasingCurve.OutQuad)
+        self.fade_animation.finished.connect(self.on_fade_finished)
+
         # 初始化导航按钮状态（初始不可用）
         self.update_nav_buttons_state()
 
@@ -162,27 +361,6 @@ class Win11TitleBar(QWidget):
         btn = QPushButton(text)
         btn.setObjectName("navButton")
         btn.setFixedSize(32, 28)  # 比窗口控制按钮稍小
-        btn.setStyleSheet(
-            """
-            #navButton {
-                color: #1a1a1a;
-                background-color: transparent;
-                border: none;
-                border-radius: 4px;
-                font-family: 'Segoe UI', sans-serif;
-                font-size: 10pt;
-            }
-            #navButton:hover {
-                background-color: rgba(0, 0, 0, 0.08);
-            }
-            #navButton:pressed {
-                background-color: rgba(0, 0, 0, 0.12);
-            }
-            #navButton:disabled {
-                color: #a0a0a0;
-            }
-        """
-        )
         btn.setFocusPolicy(Qt.NoFocus)  # 移除焦点框
         # 只有前进后退按钮初始禁用，刷新按钮始终可用
         if text in ["←", "→"]:
@@ -194,43 +372,18 @@ class Win11TitleBar(QWidget):
         btn = QPushButton(text)
         btn.setObjectName("titleButton")
         btn.setFixedSize(46, 28)  # Win11 标题栏按钮标准大小
-        btn.setStyleSheet(
-            """
-            #titleButton {
-                color: #1a1a1a;
-                background-color: transparent;
-                border: none;
-                border-radius: 4px;
-                font-family: 'Segoe UI', sans-serif;
-                font-size: 10pt;
-            }
-            #titleButton:hover {
-                background-color: rgba(0, 0, 0, 0.08);
-            }
-            #titleButton:pressed {
-                background-color: rgba(0, 0, 0, 0.12);
-            }
-            #titleButton:last-child:hover {
-                background-color: #e81123;
-                color: white;
-            }
-            #titleButton:last-child:pressed {
-                background-color: #c41021;
-            }
-        """
-        )
         btn.setFocusPolicy(Qt.NoFocus)  # 移除焦点框
         return btn
 
     def update_nav_buttons_state(self):
         """更新导航按钮状态（根据浏览历史判断是否可前进/后退）"""
         if hasattr(self.parent, "browser") and self.parent.browser:
-            # 检查是否可以后退
-            can_go_back = self.parent.browser.history().canGoBack()
+            # 检查是否可以后退（包括切换缓冲页面前的章节）
+            can_go_back = self.parent.can_go_back()
             self.back_btn.setEnabled(can_go_back)
 
             # 检查是否可以前进
-            can_go_forward = self.parent.browser.history().canGoForward()
+            can_go_forward = self.parent.can_go_forward()
             self.forward_btn.setEnabled(can_go_forward)
 
     def mouseDoubleClickEvent(self, event):
@@ -259,30 +412,2279 @@ class Win11TitleBar(QWidget):
             )
             event.accept()
 
+    def apply_opacity(self):
+        self.title_effect.setOpacity(self.bar_opacity)
+        self.controls_effect.setOpacity(self.bar_opacity * self.controls_opacity)
+
+    def get_bar_opacity(self):
+        return self.bar_opacity
+
+    def set_bar_opacity(self, value):
+        self.bar_opacity = value
+        self.apply_opacity()
+
+    barOpacity = pyqtProperty(float, get_bar_opacity, set_bar_opacity)
+
+    def get_controls_opacity(self):
+        return self.controls_opacity
+
+    def set_controls_opacity(self, value):
+        self.controls_opacity = value
+        self.apply_opacity()
+
+    controlsOpacity = pyqtProperty(float, get_controls_opacity, set_controls_opacity)
+
+    def set_controls_visible(self, visible):
+        """淡入/淡出按钮容器；隐藏时鼠标事件穿透到标题栏（仍可拖动窗口）"""
+        if visible == self.controls_visible:
+            return
+        self.controls_visible = visible
+        self.controls.setAttribute(Qt.WA_TransparentForMouseEvents, not visible)
+        self.controls_animation.stop()
+        self.controls_animation.setStartValue(self.controls_opacity)
+        self.controls_animation.setEndValue(1.0 if visible else 0.0)
+        self.controls_animation.start()
+
+    def fade_in(self):
+        """淡入显示标题栏"""
+        if self.isVisible() and self.fade_animation.endValue() == 1.0:
+            return
+        if not self.isVisible():
+            self.set_bar_opacity(0.0)
+            self.show()
+        self.raise_()
+        self.fade_animation.stop()
+        self.fade_animation.setStartValue(self.bar_opacity)
+        self.fade_animation.setEndValue(1.0)
+        self.fade_animation.start()
+
+    def fade_out(self):
+        """淡出隐藏标题栏"""
+        if not self.isVisible() or self.fade_animation.endValue() == 0.0:
+            return
+        self.fade_animation.stop()
+        self.fade_animation.setStartValue(self.bar_opacity)
+        self.fade_animation.setEndValue(0.0)
+        self.fade_animation.start()
+
+    def on_fade_finished(self):
+        """淡出结束后真正隐藏，并恢复不透明度以便直接 show()"""
+        if self.fade_animation.endValue() == 0.0:
+            self.hide()
+            self.set_bar_opacity(1.0)
+            self.fade_animation.setEndValue(1.0)
+
     def enterEvent(self, event):
         """鼠标进入标题栏时显示按钮"""
-        self.back_btn.show()
-        self.forward_btn.show()
-        self.refresh_btn.show()  # 显示刷新按钮
-        self.min_btn.show()
-        self.max_btn.show()
-        self.close_btn.show()
+        self.set_controls_visible(True)
         super().enterEvent(event)
 
     def leaveEvent(self, event):
         """鼠标离开标题栏且不在窗口顶部时隐藏按钮"""
         if not self.parent.is_fullscreen and self.parent.last_mouse_position.y() > 20:
-            self.back_btn.hide()
-            self.forward_btn.hide()
-            self.refresh_btn.hide()  # 隐藏刷新按钮
-            self.min_btn.hide()
-            self.max_btn.hide()
-            self.close_btn.hide()
+            self.set_controls_visible(False)
         super().leaveEvent(event)
 
 
+class StorageManager:
+    """浏览器配置文件的存储配额管理
+
+    QtWebEngine 没有提供按源设置配额的接口，因此在配置文件打开存储之前
+    （即创建 QWebEngineProfile 之前）直接统计磁盘上的 IndexedDB、WebSQL
+    和 Service Worker 缓存，按源计算用量，超出配额时按最近最少使用淘汰。
+    Local Storage 等多个源共用的数据库无法按源拆分，只统计不淘汰。
+    """
+
+    PER_ORIGIN_QUOTA = 100 * 1024 * 1024  # 单个源的配额
+    TOTAL_QUOTA = 300 * 1024 * 1024  # 所有源合计的配额
+    REPORT_FILE = "storage_usage.json"
+
+    # 多个源共用、无法按源淘汰的存储目录
+    SHARED_STORES = (
+        "Local Storage",
+        "Session Storage",
+        "File System",
+        os.path.join("Service Worker", "Database"),
+        os.path.join("Service Worker", "ScriptCache"),
+    )
+
+    # IndexedDB: http_example.com_8080.indexeddb.leveldb / .blob
+    INDEXEDDB_PATTERN = re.compile(r"^([a-z]+)_(.+)_(\d+)\.indexeddb\.(leveldb|blob)$")
+    # WebSQL: http_example.com_8080
+    DATABASES_PATTERN = re.compile(r"^([a-z]+)_(.+)_(\d+)$")
+    # Service Worker CacheStorage 的 index.txt 中记录了所属源
+    CACHE_ORIGIN_PATTERN = re.compile(rb"https?://[\x21-\x7e]+")
+
+    DEFAULT_PORTS = {"http": 80, "https": 443}
+
+    def __init__(self, profile_path):
+        self.profile_path = profile_path
+        self.report_path = os.path.join(profile_path, self.REPORT_FILE)
+        self.last_visit = {}  # 源 -> 最近访问时间
+        # 启动时（执行配额后）的统计结果；运行期间不再扫描磁盘
+        self.origins = {}
+        self.shared = {}
+        self.load()
+
+    @classmethod
+    def origin_key(cls, scheme, host, port):
+        """统一源的写法，省略默认端口（Chromium 目录名中默认端口记为 0）"""
+        port = int(port) if port not in (None, "") else -1
+        if port in (-1, 0, cls.DEFAULT_PORTS.get(scheme)):
+            return f"{scheme}://{host}"
+        return f"{scheme}://{host}:{port}"
+
+    @classmethod
+    def origin_of_url(cls, url):
+        """QUrl -> 源"""
+        return cls.origin_key(url.scheme(), url.host(), url.port())
+
+    def load(self):
+        try:
+            with open(self.report_path, encoding="utf-8") as f:
+                self.last_visit = json.load(f).get("last_visit", {})
+        except (OSError, ValueError):
+            self.last_visit = {}
+
+    def record_visit(self, url):
+        """记录源的访问时间，作为淘汰顺序的依据"""
+        if url.scheme() in self.DEFAULT_PORTS:
+            self.last_visit[self.origin_of_url(url)] = time.time()
+
+    @staticmethod
+    def path_usage(path):
+        """返回 (字节数, 最后修改时间)"""
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            return stat.st_size, stat.st_mtime
+        total, latest = 0, 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                total += stat.st_size
+                latest = max(latest, stat.st_mtime)
+        return total, latest
+
+    def cache_storage_origin(self, path):
+        """读取 CacheStorage 目录所属的源"""
+        try:
+            with open(os.path.join(path, "index.txt"), "rb") as f:
+                match = self.CACHE_ORIGIN_PATTERN.search(f.read())
+        except OSError:
+            return None
+        if not match:
+            return None
+        url = QUrl(match.group().decode("ascii"))
+        return self.origin_of_url(url)
+
+    def scan(self):
+        """统计各源的存储用量
+
+        返回 (origins, shared)：origins 为 源 -> {"bytes", "last_used", "stores"}，
+        stores 为 [(类别, 路径)]；shared 为 共用目录 -> 字节数。
+        """
+        origins = {}
+
+        def add(origin, kind, path):
+            size, mtime = self.path_usage(path)
+            usage = origins.setdefault(
+                origin, {"bytes": 0, "last_used": 0, "stores": []}
+            )
+            usage["bytes"] += size
+            usage["last_used"] = max(
+                usage["last_used"], mtime, self.last_visit.get(origin, 0)
+            )
+            usage["stores"].append((kind, path))
+
+        for kind, directory, pattern in (
+            ("indexeddb", "IndexedDB", self.INDEXEDDB_PATTERN),
+            ("websql", "databases", self.DATABASES_PATTERN),
+        ):
+            base = os.path.join(self.profile_path, directory)
+            if not os.path.isdir(base):
+                continue
+            for name in os.listdir(base):
+                match = pattern.match(name)
+                if match:
+                    origin = self.origin_key(*match.group(1, 2, 3))
+                    add(origin, kind, os.path.join(base, name))
+
+        base = os.path.join(self.profile_path, "Service Worker", "CacheStorage")
+        if os.path.isdir(base):
+            for name in os.listdir(base):
+                path = os.path.join(base, name)
+                origin = self.cache_storage_origin(path)
+                if origin:
+                    add(origin, "cachestorage", path)
+
+        shared = {}
+        for name in self.SHARED_STORES:
+            path = os.path.join(self.profile_path, name)
+            if os.path.exists(path):
+                shared[name] = self.path_usage(path)[0]
+        return origins, shared
+
+    def evict(self, origin, usage, stores):
+        """删除源的部分存储并更新用量"""
+        for kind, path in stores:
+            size, _ = self.path_usage(path)
+            try:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            except OSError as e:
+                logging.error(f"Storage eviction failed for {path}: {e}")
+                continue
+            usage["bytes"] -= size
+            usage["stores"].remove((kind, path))
+
+    def enforce(self):
+        """执行配额：必须在 QWebEngineProfile 打开存储之前调用"""
+        origins, shared = self.scan()
+
+        # 超出单源配额：先清可再生的 Service Worker 缓存，仍超出则清空该源
+        for origin, usage in origins.items():
+            if usage["bytes"] <= self.PER_ORIGIN_QUOTA:
+                continue
+            caches = [s for s in usage["stores"] if s[0] == "cachestorage"]
+            self.evict(origin, usage, caches)
+            if usage["bytes"] > self.PER_ORIGIN_QUOTA:
+                self.evict(origin, usage, list(usage["stores"]))
+
+        # 超出总配额：按最近最少使用的顺序清空源
+        total = sum(usage["bytes"] for usage in origins.values())
+        for origin in sorted(origins, key=lambda o: origins[o]["last_used"]):
+            if total <= self.TOTAL_QUOTA:
+                break
+            usage = origins[origin]
+            before = usage["bytes"]
+            self.evict(origin, usage, list(usage["stores"]))
+            total -= before - usage["bytes"]
+
+        self.origins, self.shared = origins, shared
+        self.save()
+        return origins, shared
+
+    def save(self):
+        """写入用量报告和访问记录
+
+        用量使用启动时的统计结果：退出时在界面线程中重新扫描各源的存储目录
+        会拖慢退出，下次启动时会重新统计。
+        """
+        origins, shared = self.origins, self.shared
+        report = {
+            "last_visit": self.last_visit,
+            "origins": {
+                origin: {"bytes": usage["bytes"], "last_used": usage["last_used"]}
+                for origin, usage in sorted(
+                    origins.items(), key=lambda item: -item[1]["bytes"]
+                )
+                if usage["bytes"] > 0
+            },
+            "shared": shared,
+        }
+        try:
+            with open(self.report_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            logging.error(f"Failed to write storage report: {e}")
+
+    def usage_report(self, limit=3):
+        """返回启动时各源存储用量的说明文本（列出用量最大的几个源）"""
+        ranked = sorted(
+            (
+                (origin, usage["bytes"])
+                for origin, usage in self.origins.items()
+                if usage["bytes"] > 0
+            ),
+            key=lambda item: -item[1],
+        )
+        total = sum(size for _, size in ranked)
+        text = f"网站存储：{len(ranked)} 个网站共 {total / 1024 / 1024:.1f} MB"
+        if ranked:
+            largest = "，".join(
+                f"{origin} {size / 1024 / 1024:.1f} MB" for origin, size in ranked[:limit]
+            )
+            text += f"（{largest}）"
+        return text
+
+    @staticmethod
+    def shutdown_profile(view, pages, profile):
+        """按顺序释放视图、页面和配置文件，让 Chromium 写出 cookie 和本地存储
+
+        QtWebEngine 在配置文件销毁时才把 cookie、Local Storage 等提交到磁盘，
+        而页面仍存在时配置文件不会被释放。这里同步删除它们，写盘由 Chromium
+        在退出流程中完成（Qt 没有提供等待写盘完成的接口），
+        最后处理一次销毁过程中投递的事件。
+        """
+        for obj in [view] + list(pages) + [profile]:
+            if obj is not None and not sip.isdeleted(obj):
+                sip.delete(obj)
+        QCoreApplication.processEvents()
+
+
+class ChainedRequestInterceptor(QWebEngineUrlRequestInterceptor):
+    """依次调用多个拦截器（每个配置文件只能设置一个拦截器）"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.interceptors = []
+
+    def add(self, interceptor):
+        self.interceptors.append(interceptor)
+
+    def interceptRequest(self, info):
+        for interceptor in self.interceptors:
+            interceptor.interceptRequest(info)
+
+
+class NetworkCaptureInterceptor(QWebEngineUrlRequestInterceptor):
+    """记录配置文件内的所有网络请求（只记录，不修改请求）"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.lock = threading.Lock()
+        self.requests = []  # 当前导航期间的请求
+
+        # 资源类型编号 -> 名称
+        self.resource_type_names = {
+            int(value): name
+            for name, value in vars(QWebEngineUrlRequestInfo).items()
+            if isinstance(value, QWebEngineUrlRequestInfo.ResourceType)
+        }
+
+    def interceptRequest(self, info):
+        resource_type = int(info.resourceType())
+        record = {
+            "url": info.requestUrl().toString(),
+            "method": bytes(info.requestMethod()).decode("ascii", "replace"),
+            "resourceType": self.resource_type_names.get(
+                resource_type, str(resource_type)
+            ),
+            "firstPartyUrl": info.firstPartyUrl().toString(),
+            "wallTime": time.time(),
+        }
+        with self.lock:
+            # 主框架请求表示开始新的导航，丢弃上一次导航的记录
+            if resource_type == QWebEngineUrlRequestInfo.ResourceTypeMainFrame:
+                self.requests = []
+            self.requests.append(record)
+
+    def take_requests(self):
+        """取出当前导航期间记录的请求"""
+        with self.lock:
+            requests, self.requests = self.requests, []
+        return requests
+
+
+class NetworkCapture(QObject):
+    """网络瀑布图采集：合并拦截到的请求与页面 Resource Timing 数据并导出 HAR
+
+    通过环境变量 ONLINEREADING_NETWORK_CAPTURE=1 或命令行参数 --network-capture 开启。
+    每次页面加载完成后在 network_capture/ 目录写入一个 HAR 文件，
+    并保留最慢/最大资源的摘要供界面显示（F12）。
+    """
+
+    ENV_FLAG = "ONLINEREADING_NETWORK_CAPTURE"
+    CLI_FLAG = "--network-capture"
+
+    # 页面加载完成后等待一段时间再采集，让延迟加载的资源也能记录到
+    COLLECT_DELAY = 1000
+    TOP_N = 10
+    MAX_CAPTURES = 50  # 保留的 HAR 文件数量
+
+    # 页面默认只缓存 150 条 Resource Timing 记录，章节页资源较多时会丢失
+    TIMING_BUFFER_JS = """
+        if (window.performance && performance.setResourceTimingBufferSize) {
+            performance.setResourceTimingBufferSize(2000);
+        }
+    """
+
+    COLLECT_TIMING_JS = """
+        (function() {
+            var fields = ['name', 'initiatorType', 'nextHopProtocol', 'startTime',
+                'duration', 'redirectStart', 'redirectEnd', 'fetchStart',
+                'domainLookupStart', 'domainLookupEnd', 'connectStart',
+                'connectEnd', 'secureConnectionStart', 'requestStart',
+                'responseStart', 'responseEnd', 'transferSize',
+                'encodedBodySize', 'decodedBodySize',
+                'domContentLoadedEventEnd', 'loadEventEnd'];
+            function pick(entry) {
+                var result = {};
+                fields.forEach(function(field) {
+                    if (entry[field] !== undefined) {
+                        result[field] = entry[field];
+                    }
+                });
+                return result;
+            }
+            return JSON.stringify({
+                timeOrigin: performance.timeOrigin,
+                url: location.href,
+                title: document.title,
+                navigation: performance.getEntriesByType('navigation').map(pick),
+                resources: performance.getEntriesByType('resource').map(pick)
+            });
+        })();
+    """
+
+    def __init__(self, profile, request_interceptor, output_dir, parent=None):
+        super().__init__(parent)
+        self.output_dir = output_dir
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.interceptor = NetworkCaptureInterceptor(self)
+        request_interceptor.add(self.interceptor)
+        self.summary = "尚未采集到页面数据"
+
+        script = QWebEngineScript()
+        script.setName("networkCaptureTimingBuffer")
+        script.setSourceCode(self.TIMING_BUFFER_JS)
+        script.setInjectionPoint(QWebEngineScript.DocumentCreation)
+        script.setWorldId(QWebEngineScript.MainWorld)
+        script.setRunsOnSubFrames(True)
+        profile.scripts().insert(script)
+
+    @classmethod
+    def enabled_from_environment(cls, argv):
+        """根据环境变量/命令行参数判断是否开启网络采集"""
+        enabled = os.environ.get(cls.ENV_FLAG, "") not in ("", "0")
+        if cls.CLI_FLAG in argv:
+            argv.remove(cls.CLI_FLAG)  # 不传递给 Qt
+            enabled = True
+        return enabled
+
+    def schedule_collect(self, page):
+        """页面加载完成后延迟采集"""
+        QTimer.singleShot(self.COLLECT_DELAY, lambda: self.collect(page))
+
+    def collect(self, page):
+        if sip.isdeleted(page):  # 窗口已关闭
+            return
+        page.runJavaScript(self.COLLECT_TIMING_JS, self.on_timing_collected)
+
+    def on_timing_collected(self, result):
+        requests = self.interceptor.take_requests()
+        if not result:
+            return
+        try:
+            timing = json.loads(result)
+        except ValueError:
+            logging.error("Network capture: invalid timing data")
+            return
+
+        har = self.build_har(timing, requests)
+        path = self.capture_path()
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(har, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            logging.error(f"Network capture: failed to write {path}: {e}")
+            return
+        self.summary = self.build_summary(timing, har, path)
+
+    def capture_path(self):
+        """按毫秒时间命名 HAR 文件，同一毫秒内多次导航时追加序号"""
+        now = time.time()
+        base = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + (
+            "-%03d" % (int(now * 1000) % 1000)
+        )
+        path = os.path.join(self.output_dir, base + ".har")
+        index = 1
+        while os.path.exists(path):
+            path = os.path.join(self.output_dir, f"{base}-{index}.har")
+            index += 1
+        return path
+
+    @staticmethod
+    def iso_time(epoch_ms):
+        """毫秒时间戳转换为 HAR 要求的 ISO 8601 时间"""
+        seconds, ms = divmod(int(epoch_ms), 1000)
+        return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds)) + (
+            ".%03dZ" % ms
+        )
+
+    @staticmethod
+    def timing_span(entry, start, end):
+        """计算两个时间点的间隔，不可用（跨域未授权等）时返回 -1"""
+        start_value = entry.get(start, 0)
+        end_value = entry.get(end, 0)
+        if not start_value or not end_value or end_value < start_value:
+            return -1
+        return round(end_value - start_value, 3)
+
+    def build_entry(self, entry, time_origin, page_id, request=None):
+        """由一条 Resource Timing 记录（及对应的拦截记录）生成 HAR entry"""
+        timings = {
+            "blocked": self.timing_span(entry, "fetchStart", "domainLookupStart"),
+            "dns": self.timing_span(entry, "domainLookupStart", "domainLookupEnd"),
+            "connect": self.timing_span(entry, "connectStart", "connectEnd"),
+            "ssl": self.timing_span(entry, "secureConnectionStart", "connectEnd"),
+            "send": 0,
+            "wait": self.timing_span(entry, "requestStart", "responseStart"),
+            "receive": self.timing_span(entry, "responseStart", "responseEnd"),
+        }
+        # HAR 规定 send/wait/receive 不能为 -1
+        for key in ("wait", "receive"):
+            if timings[key] < 0:
+                timings[key] = 0
+        if timings["wait"] == 0 and timings["receive"] == 0:
+            timings["wait"] = round(entry.get("duration", 0), 3)
+
+        encoded_size = entry.get("encodedBodySize", 0)
+        return {
+            "pageref": page_id,
+            "startedDateTime": self.iso_time(time_origin + entry.get("startTime", 0)),
+            "time": round(entry.get("duration", 0), 3),
+            "request": {
+                "method": request["method"] if request else "GET",
+                "url": entry["name"],
+                "httpVersion": entry.get("nextHopProtocol", ""),
+                "cookies": [],
+                "headers": [],
+                "queryString": [],
+                "headersSize": -1,
+                "bodySize": -1,
+            },
+            "response": {
+                "status": 0,  # Resource Timing 不提供状态码
+                "statusText": "",
+                "httpVersion": entry.get("nextHopProtocol", ""),
+                "cookies": [],
+                "headers": [],
+                "content": {
+                    "size": entry.get("decodedBodySize", 0),
+                    "mimeType": "",
+                },
+                "redirectURL": "",
+                "headersSize": -1,
+                "bodySize": encoded_size if encoded_size else -1,
+                "_transferSize": entry.get("transferSize", 0),
+            },
+            "cache": {},
+            "timings": timings,
+            "_initiatorType": entry.get("initiatorType", ""),
+            "_resourceType": request["resourceType"] if request else "",
+        }
+
+    def build_har(self, timing, requests):
+        """生成 HAR 1.2 文档"""
+        time_origin = timing.get("timeOrigin") or time.time() * 1000
+        page_id = "page_1"
+        navigation = timing["navigation"][0] if timing["navigation"] else {}
+
+        # 同一 URL 可能请求多次，按顺序一一对应
+        pending = {}
+        for request in requests:
+            pending.setdefault(request["url"], []).append(request)
+
+        entries = []
+        if navigation:
+            navigation = dict(navigation, name=timing["url"])
+            matched = pending.get(timing["url"])
+            entries.append(
+                self.build_entry(
+                    navigation, time_origin, page_id, matched.pop(0) if matched else None
+                )
+            )
+        for entry in timing["resources"]:
+            matched = pending.get(entry["name"])
+            entries.append(
+                self.build_entry(
+                    entry, time_origin, page_id, matched.pop(0) if matched else None
+                )
+            )
+
+        # 拦截到但没有 Resource Timing 记录的请求（失败、未完成或在子框架中）
+        for url, remaining in pending.items():
+            for request in remaining:
+                entries.append(
+                    {
+                        "pageref": page_id,
+                        "startedDateTime": self.iso_time(request["wallTime"] * 1000),
+                        "time": 0,
+                        "request": {
+                            "method": request["method"],
+                            "url": url,
+                            "httpVersion": "",
+                            "cookies": [],
+                            "headers": [],
+                            "queryString": [],
+                            "headersSize": -1,
+                            "bodySize": -1,
+                        },
+                        "response": {
+                            "status": 0,
+                            "statusText": "",
+                            "httpVersion": "",
+                            "cookies": [],
+                            "headers": [],
+                            "content": {"size": 0, "mimeType": ""},
+                            "redirectURL": "",
+                            "headersSize": -1,
+                            "bodySize": -1,
+                        },
+                        "cache": {},
+                        "timings": {"send": 0, "wait": 0, "receive": 0},
+                        "_resourceType": request["resourceType"],
+                        "_incomplete": True,
+                    }
+                )
+
+        page_timings = {"onContentLoad": -1, "onLoad": -1}
+        if navigation:
+            page_timings["onContentLoad"] = round(
+                navigation.get("domContentLoadedEventEnd", -1), 3
+            )
+            page_timings["onLoad"] = round(navigation.get("loadEventEnd", -1), 3)
+
+        return {
+            "log": {
+                "version": "1.2",
+                "creator": {"name": "OnlineReading", "version": "1.0"},
+                "pages": [
+                    {
+                        "startedDateTime": self.iso_time(time_origin),
+                        "id": page_id,
+                        "title": timing.get("title") or timing["url"],
+                        "pageTimings": page_timings,
+                    }
+                ],
+                "entries": entries,
+            }
+        }
+
+    def prune_captures(self, context):
+        """维护任务：只保留最新的 MAX_CAPTURES 个 HAR 文件"""
+        captures = sorted(
+            name for name in os.listdir(self.output_dir) if name.endswith(".har")
+        )
+        removed = 0
+        for name in captures[: -self.MAX_CAPTURES]:
+            context.check()
+            try:
+                os.remove(os.path.join(self.output_dir, name))
+            except OSError:
+                continue
+            removed += 1
+        return f"removed {removed} capture(s)"
+
+    @staticmethod
+    def entry_size(entry):
+        """资源的传输大小；Resource Timing 中大小全为 0 时返回 None"""
+        response = entry["response"]
+        size = max(response["_transferSize"], response["bodySize"])
+        if size <= 0 and response["content"]["size"] <= 0:
+            return None
+        return size
+
+    def build_summary(self, timing, har, path):
+        """生成最慢/最大资源摘要文本"""
+        entries = [e for e in har["log"]["entries"] if not e.get("_incomplete")]
+        slowest = sorted(entries, key=lambda e: e["time"], reverse=True)
+
+        # 没有 Timing-Allow-Origin 的跨域资源大小报告为 0，单独列出而不按 0 排序
+        page_origin = StorageManager.origin_of_url(QUrl(timing["url"]))
+        sized, unknown = [], []
+        for entry in entries:
+            size = self.entry_size(entry)
+            origin = StorageManager.origin_of_url(QUrl(entry["request"]["url"]))
+            if size is None and origin != page_origin:
+                unknown.append(entry)
+            else:
+                sized.append((size or 0, entry))
+        largest = sorted(sized, key=lambda item: item[0], reverse=True)
+
+        lines = [f"页面: {timing['url']}", f"HAR: {path}", "", "最慢资源:"]
+        for entry in slowest[: self.TOP_N]:
+            lines.append(f"  {entry['time']:8.0f} ms  {entry['request']['url']}")
+        lines += ["", "最大资源:"]
+        for size, entry in largest[: self.TOP_N]:
+            lines.append(f"  {size / 1024:8.1f} KB  {entry['request']['url']}")
+        if unknown:
+            lines += ["", "大小未知（跨域，服务器未提供 Timing-Allow-Origin）:"]
+            for entry in sorted(unknown, key=lambda e: e["time"], reverse=True)[
+                : self.TOP_N
+            ]:
+                lines.append(f"  {entry['time']:8.0f} ms  {entry['request']['url']}")
+        incomplete = len(har["log"]["entries"]) - len(entries)
+        if incomplete:
+            lines += ["", f"另有 {incomplete} 个请求没有计时数据（失败或未完成）"]
+        return "\n".join(lines)
+
+
+class NetworkSummaryPanel(QFrame):
+    """显示网络采集摘要的浮层（F12 切换）"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setObjectName("networkSummaryPanel")
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(12, 12, 12, 12)
+        self.label = QLabel(self)
+        self.label.setObjectName("networkSummaryLabel")
+        self.label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        self.label.setAlignment(Qt.AlignLeft | Qt.AlignTop)
+        layout.addWidget(self.label)
+        self.hide()
+
+    def set_summary(self, text):
+        self.label.setText(text)
+
+
+class MappedFileDevice(QIODevice):
+    """从内存映射文件读取数据的只读设备，供 URL 方案处理器返回"""
+
+    def __init__(self, mapped):
+        super().__init__()
+        self.mapped = mapped
+        self.position = 0
+        self.open(QIODevice.ReadOnly | QIODevice.Unbuffered)
+
+    def readData(self, maxlen):
+        data = self.mapped[self.position : self.position + maxlen]
+        self.position += len(data)
+        return data
+
+    def writeData(self, data):
+        return -1
+
+    def isSequential(self):
+        return False
+
+    def size(self):
+        return len(self.mapped)
+
+    def seek(self, pos):
+        super().seek(pos)
+        self.position = pos
+        return True
+
+    def bytesAvailable(self):
+        return len(self.mapped) - self.position + super().bytesAvailable()
+
+
+class LocalFonts(QWebEngineUrlSchemeHandler):
+    """本地 CJK 字体：把网页的字体请求重定向到 localfont: 方案，从内存映射文件返回
+
+    字体来源有两种：
+    - 随程序发布的字体：fonts/ 目录下的字体文件，由 fonts/fonts.json 配置
+      {"fonts": [{"file": "NotoSansSC-Regular.woff2", "match": ["notosanssc"]}],
+       "cache": ["notosanssc", "sourcehan"]}
+      请求地址包含 match 中任一字符串（不区分大小写）时使用该文件。
+    - 预缓存的字体：请求地址匹配 cache 中的字符串但没有本地文件时，在后台下载到
+      browser_profile/font_cache，此后的请求直接使用本地副本。
+    随程序发布的字体同时通过 QFontDatabase 注册，界面也可以使用。
+    """
+
+    SCHEME = b"localfont"
+    STATS_FILE = "font_stats.json"
+    MAX_CACHE_BYTES = 200 * 1024 * 1024  # 预缓存字体的总大小上限
+
+    FONT_EXTENSIONS = {
+        ".woff2": b"font/woff2",
+        ".woff": b"font/woff",
+        ".ttf": b"font/ttf",
+        ".otf": b"font/otf",
+    }
+
+    # 没有配置文件时预缓存的常见 CJK 网页字体
+    DEFAULT_CACHE_PATTERNS = [
+        "notosanssc",
+        "notoserifsc",
+        "noto-sans-sc",
+        "noto-serif-sc",
+        "notosanscjk",
+        "notoserifcjk",
+        "sourcehan",
+        "source-han",
+        "lxgw",
+        "wenkai",
+    ]
+
+    @classmethod
+    def register_scheme(cls):
+        """注册 localfont: 方案，必须在创建 QApplication 之前调用"""
+        scheme = QWebEngineUrlScheme(cls.SCHEME)
+        scheme.setSyntax(QWebEngineUrlScheme.Syntax.Path)
+        scheme.setFlags(
+            QWebEngineUrlScheme.SecureScheme
+            | QWebEngineUrlScheme.CorsEnabled
+            | QWebEngineUrlScheme.ContentSecurityPolicyIgnored
+        )
+        QWebEngineUrlScheme.registerScheme(scheme)
+
+    @staticmethod
+    def find_font_dir():
+        """查找随程序发布的字体目录，支持开发环境和打包后环境"""
+        candidates = [os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts")]
+        if hasattr(sys, "_MEIPASS"):
+            candidates.append(os.path.join(sys._MEIPASS, "fonts"))
+            candidates.append(os.path.join(sys._MEIPASS, "resources", "fonts"))
+        for path in candidates:
+            if os.path.isdir(path):
+                return path
+        return None
+
+    def __init__(self, profile, request_interceptor, cache_dir, parent=None):
+        super().__init__(parent)
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.stats_path = os.path.join(self.cache_dir, self.STATS_FILE)
+
+        self.lock = threading.Lock()
+        self.bundled = []  # [(匹配字符串列表, 文件路径)]
+        self.cache_patterns = list(self.DEFAULT_CACHE_PATTERNS)
+        self.downloading = set()  # 已排队或正在下载的缓存路径
+        self.candidates = {}  # 等待页面加载完成后下载：缓存路径 -> (地址, 来源页面)
+        self.download_queue = queue.Queue()
+        self.download_thread = None
+        self.served = set()  # 本次会话已从本地提供过的文件
+        self.mapped = {}  # 文件路径 -> mmap
+        self.devices = set()  # 正在返回数据的设备，防止被回收
+        self.session_bytes_avoided = 0
+        self.session_requests = 0
+        self.stats = {"bytes_avoided": 0, "requests": 0}
+        self.load_config()
+        self.load_stats()
+
+        profile.installUrlSchemeHandler(self.SCHEME, self)
+        request_interceptor.add(FontRedirectInterceptor(self, self))
+
+    def load_config(self):
+        font_dir = self.find_font_dir()
+        if font_dir is None:
+            return
+        try:
+            with open(os.path.join(font_dir, "fonts.json"), encoding="utf-8") as f:
+                config = json.load(f)
+        except (OSError, ValueError):
+            config = {}
+
+        for font in config.get("fonts", []):
+            path = os.path.join(font_dir, font["file"])
+            if not os.path.isfile(path):
+                logging.error(f"Bundled font not found: {path}")
+                continue
+            patterns = [p.lower() for p in font.get("match", [])]
+            if patterns:
+                self.bundled.append((patterns, path))
+            # 注册到 Qt 字体数据库，供界面使用
+            if QFontDatabase.addApplicationFont(path) < 0:
+                logging.error(f"Failed to register font: {path}")
+        if "cache" in config:
+            self.cache_patterns = [p.lower() for p in config["cache"]]
+
+    def load_stats(self):
+        try:
+            with open(self.stats_path, encoding="utf-8") as f:
+                self.stats.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+
+    def save_stats(self):
+        """写入累计节省的下载量"""
+        with self.lock:
+            stats = dict(self.stats)
+        try:
+            with open(self.stats_path, "w", encoding="utf-8") as f:
+                json.dump(stats, f, indent=2)
+        except OSError as e:
+            logging.error(f"Failed to write font stats: {e}")
+
+    def trim_cache(self, context):
+        """维护任务：预缓存字体超过上限时删除最久未修改的文件"""
+        with self.lock:
+            in_use = set(self.mapped)
+        files = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if os.path.splitext(name)[1] in self.FONT_EXTENSIONS and path not in in_use:
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= self.MAX_CACHE_BYTES:
+                break
+            context.check()
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return f"removed {removed} cached font(s)"
+
+    def report(self):
+        """返回节省下载量的说明文本"""
+        with self.lock:
+            return (
+                f"本地字体：本次 {self.session_requests} 个请求，"
+                f"{len(self.served)} 个字体免下载 "
+                f"{self.session_bytes_avoided / 1024 / 1024:.1f} MB；"
+                f"累计节省 {self.stats['bytes_avoided'] / 1024 / 1024:.1f} MB"
+            )
+
+    @classmethod
+    def font_extension(cls, url):
+        path = url.path().lower()
+        for extension in cls.FONT_EXTENSIONS:
+            if path.endswith(extension):
+                return extension
+        return None
+
+    def cache_path(self, url, extension):
+        key = hashlib.sha1(url.toString().encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key + extension)
+
+    def local_url(self, url, referer=None):
+        """返回字体请求对应的 localfont: 地址，没有本地副本时返回 None
+
+        匹配预缓存规则但还没有本地副本的字体先记录下来，
+        等页面加载完成后再由 start_precache 下载，避免与页面争抢带宽。
+        """
+        extension = self.font_extension(url)
+        if extension is None:
+            return None
+        text = url.toString().lower()
+        for patterns, path in self.bundled:
+            if any(pattern in text for pattern in patterns):
+                return QUrl("localfont:/bundled/" + os.path.basename(path))
+
+        path = self.cache_path(url, extension)
+        if os.path.isfile(path):
+            return QUrl("localfont:/cache/" + os.path.basename(path))
+        if any(pattern in text for pattern in self.cache_patterns):
+            with self.lock:
+                if path not in self.downloading:
+                    self.candidates[path] = (url.toString(), referer)
+        return None
+
+    def start_precache(self, user_agent):
+        """页面加载完成后，把记录的字体交给下载线程依次下载"""
+        with self.lock:
+            candidates, self.candidates = self.candidates, {}
+            for path, (url, referer) in candidates.items():
+                if path in self.downloading:
+                    continue
+                self.downloading.add(path)
+                self.download_queue.put((url, referer, user_agent, path))
+            if candidates and self.download_thread is None:
+                self.download_thread = threading.Thread(
+                    target=self.download_worker, name="FontPrecache", daemon=True
+                )
+                self.download_thread.start()
+
+    def download_worker(self):
+        """唯一的下载线程：从队列中依次下载字体到缓存目录"""
+        while True:
+            url, referer, user_agent, path = self.download_queue.get()
+            temp_path = path + ".part"
+            headers = {"User-Agent": user_agent}
+            if referer:
+                headers["Referer"] = referer  # 字体 CDN 通常会校验来源页面
+            try:
+                request = urllib.request.Request(url, headers=headers)
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    with open(temp_path, "wb") as f:
+                        shutil.copyfileobj(response, f)
+                os.replace(temp_path, path)
+            except (OSError, ValueError) as e:
+                logging.error(f"Font pre-cache failed for {url}: {e}")
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            finally:
+                with self.lock:
+                    self.downloading.discard(path)
+
+    def resolve(self, url):
+        """localfont: 地址 -> 本地文件路径"""
+        parts = url.path().strip("/").split("/")
+        if len(parts) != 2 or parts[1] in ("", ".", ".."):
+            return None
+        kind, name = parts
+        if kind == "bundled":
+            for _, path in self.bundled:
+                if os.path.basename(path) == name:
+                    return path
+        elif kind == "cache":
+            path = os.path.join(self.cache_dir, name)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def map_file(self, path):
+        """内存映射字体文件（同一文件只映射一次）"""
+        with self.lock:
+            mapped = self.mapped.get(path)
+            if mapped is None:
+                with open(path, "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self.mapped[path] = mapped
+            return mapped
+
+    def requestStarted(self, job):
+        path = self.resolve(job.requestUrl())
+        if path is None:
+            job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+            return
+        try:
+            mapped = self.map_file(path)
+        except (OSError, ValueError) as e:
+            logging.error(f"Failed to map font {path}: {e}")
+            job.fail(QWebEngineUrlRequestJob.RequestFailed)
+            return
+
+        device = MappedFileDevice(mapped)
+        with self.lock:
+            self.devices.add(device)
+            self.session_requests += 1
+            self.stats["requests"] += 1
+            # 同一字体在一次会话中只计一次，之后的请求本来也会命中浏览器缓存
+            if path not in self.served:
+                self.served.add(path)
+                self.session_bytes_avoided += len(mapped)
+                self.stats["bytes_avoided"] += len(mapped)
+        job.destroyed.connect(lambda: self.release_device(device))
+        mime_type = self.FONT_EXTENSIONS[os.path.splitext(path)[1].lower()]
+        job.reply(mime_type, device)
+
+    def release_device(self, device):
+        with self.lock:
+            self.devices.discard(device)
+
+
+class FontRedirectInterceptor(QWebEngineUrlRequestInterceptor):
+    """把有本地副本的字体请求重定向到 localfont: 方案"""
+
+    def __init__(self, fonts, parent=None):
+        super().__init__(parent)
+        self.fonts = fonts
+
+    def interceptRequest(self, info):
+        if info.resourceType() != QWebEngineUrlRequestInfo.ResourceTypeFontResource:
+            return
+        url = info.requestUrl()
+        if url.scheme() not in ("http", "https"):
+            return
+        local_url = self.fonts.local_url(url, info.firstPartyUrl().toString())
+        if local_url is not None:
+            info.redirect(local_url)
+
+
+CHINESE_DIGITS = {
+    "零": 0, "〇": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4,
+    "五": 5, "六": 6, "七": 7, "八": 8, "九": 9,
+}
+CHINESE_UNITS = {"十": 10, "百": 100, "千": 1000, "万": 10000}
+
+
+def chinese_to_int(text):
+    """把中文或阿拉伯数字转换为整数（如“四百三十七” -> 437），无法转换时返回 None"""
+    text = text.strip()
+    # isdigit() 对“①”“²”等字符也为真，但 int() 无法转换
+    if text.isdecimal():
+        return int(text)
+    if not text or any(c not in CHINESE_DIGITS and c not in CHINESE_UNITS for c in text):
+        return None
+    total, section, digit = 0, 0, 0
+    for char in text:
+        if char in CHINESE_DIGITS:
+            digit = CHINESE_DIGITS[char]
+        elif char == "万":
+            section = (section + digit) * 10000
+            total += section
+            section, digit = 0, 0
+        else:
+            # “十二”中的“十”前面没有数字，按一十处理
+            section += (digit or 1) * CHINESE_UNITS[char]
+            digit = 0
+    return total + section + digit
+
+
+class TocIndex:
+    """本地目录索引：书 -> 有序章节列表（标题、地址）
+
+    访问目录页时解析章节链接并增量合并到 SQLite 数据库，
+    全部章节同时保存在内存中，快速跳转时无需访问服务器。
+    同一本书的章节通常位于同一目录下（或在扁平目录中共用文件名前缀），
+    因此以章节地址的公共部分作为书的标识，分页目录的各页会合并到同一本书。
+    内存中的数据是权威副本，数据库写入统一交给一个后台写线程按顺序执行，
+    界面线程不会等待磁盘或数据库锁。
+    """
+
+    MIN_CHAPTERS = 10  # 少于此数量的链接不视为目录页
+
+    # 提取页面中的章节链接；同一地址重复出现时保留最后一次的位置
+    # （目录页顶部的“最新章节”区块通常会重复列出部分章节）
+    EXTRACT_TOC_JS = """
+        (function() {
+            var pattern = /^\\s*(第\\s*[0-9零〇一二两三四五六七八九十百千万]+\\s*[章节回卷集话]|chapter\\s*\\d+|\\d+\\s*[.、:：\\s])/i;
+            var anchors = document.querySelectorAll('a[href]');
+            var chapters = [];
+            var index = {};
+            for (var i = 0; i < anchors.length; i++) {
+                var a = anchors[i];
+                var text = a.textContent.trim();
+                if (!text || text.length > 60 || !pattern.test(text)) {
+                    continue;
+                }
+                if (a.host !== location.host) {
+                    continue;
+                }
+                var href = a.href.split('#')[0];
+                if (index[href] !== undefined) {
+                    chapters[index[href]] = null;
+                }
+                index[href] = chapters.length;
+                chapters.push([text, href]);
+            }
+            return JSON.stringify({
+                title: document.title,
+                url: location.href.split('#')[0],
+                chapters: chapters.filter(function(c) { return c !== null; })
+            });
+        })();
+    """
+
+    CHAPTER_NUMBER_PATTERN = re.compile(
+        r"第\s*([0-9零〇一二两三四五六七八九十百千万]+)\s*[章节回话]|chapter\s*(\d+)",
+        re.IGNORECASE,
+    )
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        db = sqlite3.connect(db_path)
+        db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS books (
+                id INTEGER PRIMARY KEY,
+                key TEXT UNIQUE NOT NULL,
+                title TEXT NOT NULL,
+                toc_url TEXT NOT NULL,
+                updated REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS chapters (
+                book_id INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                title TEXT NOT NULL,
+                url TEXT NOT NULL,
+                PRIMARY KEY (book_id, url)
+            );
+            """
+        )
+        self.books = {}  # id -> {"key", "title", "toc_url", "updated"}
+        self.chapters = {}  # id -> [(标题, 地址)]
+        self.url_to_book = {}  # 章节/目录地址 -> 书 id
+        self.toc_urls = set()  # 目录页地址（不是章节）
+        try:
+            self.load(db)
+        finally:
+            db.close()
+        # 写连接只在写线程中创建和使用
+        self.writer_db = None
+        self.writer = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="TocIndexWriter"
+        )
+
+    def load(self, db):
+        for book_id, key, title, toc_url, updated in db.execute(
+            "SELECT id, key, title, toc_url, updated FROM books"
+        ):
+            self.books[book_id] = {
+                "key": key,
+                "title": title,
+                "toc_url": toc_url,
+                "updated": updated,
+            }
+            self.chapters[book_id] = []
+            self.url_to_book[toc_url] = book_id
+            self.toc_urls.add(toc_url)
+        for book_id, title, url in db.execute(
+            "SELECT book_id, title, url FROM chapters ORDER BY book_id, position"
+        ):
+            self.chapters[book_id].append((title, url))
+            self.url_to_book[url] = book_id
+
+    def write(self, func, *args):
+        """在写线程中执行 func(db, *args)，整个调用是一个事务"""
+        return self.writer.submit(self.write_worker, func, *args)
+
+    def write_worker(self, func, *args):
+        if self.writer_db is None:
+            self.writer_db = sqlite3.connect(self.db_path)
+        try:
+            with self.writer_db:
+                func(self.writer_db, *args)
+        except sqlite3.Error as e:
+            logging.error(f"TOC index write failed: {e}")
+
+    def close(self):
+        """等待尚未完成的写入，然后关闭写连接"""
+        self.writer.submit(self.close_worker)
+        self.writer.shutdown(wait=True)
+
+    def close_worker(self):
+        if self.writer_db is not None:
+            self.writer_db.close()
+            self.writer_db = None
+
+    def compact(self, context):
+        """维护任务：在写线程中整理数据库
+
+        VACUUM 需要独占数据库，与其他写入放在同一个线程中依次执行，
+        不会出现“database is locked”；期间产生的写入在队列中等待。
+        """
+        return self.writer.submit(self.vacuum_worker, context).result()
+
+    def vacuum_worker(self, context):
+        if self.writer_db is None:
+            self.writer_db = sqlite3.connect(self.db_path)
+        db = self.writer_db
+        # 写线程中的 CPU 时间单独计时，结束后计入任务总量
+        context.start_cpu()
+        cancelled = []
+
+        def progress():
+            try:
+                context.check()
+            except JobCancelled as e:
+                cancelled.append(e)
+                return 1  # 非零返回值中断当前语句
+            return 0
+
+        db.set_progress_handler(progress, 10000)
+        try:
+            db.execute("VACUUM")
+        except sqlite3.OperationalError:
+            if cancelled:
+                raise cancelled[0]
+            raise
+        finally:
+            db.set_progress_handler(None, 0)
+            context.stop_cpu()
+        return "vacuumed"
+
+    @staticmethod
+    def normalize(url):
+        return url.split("#")[0].rstrip("/")
+
+    @staticmethod
+    def book_key(toc_url, urls):
+        """章节地址的公共部分作为书的标识，找不到时使用目录页地址
+
+        只由章节地址决定，分页目录的各页（/book/12/、/book/12/index_2.html）
+        得到相同的标识：
+        - 站点根目录下两级以上的公共目录（/book/12/）
+        - 扁平目录中共用的文件名前缀（/read/99_1.html -> /read/99_）
+        - 站点根目录下含数字的一级目录（/12345/）
+        /read/ 这类一级目录包含站点上所有的书，不能作为标识。
+        """
+        prefix = os.path.commonprefix(urls)
+        prefix = prefix[: prefix.rfind("/") + 1]
+        depth = prefix.count("/") - 3  # scheme://host/ 之后的目录层数
+        if depth >= 2:
+            return prefix
+        if depth >= 0:
+            names = os.path.commonprefix([url[len(prefix) :] for url in urls])
+            stem = names[: max(names.rfind("_"), names.rfind("-")) + 1]
+            if len(stem) > 1:
+                return prefix + stem
+            if depth == 1 and any(c.isdigit() for c in prefix.split("/")[-2]):
+                return prefix
+        return toc_url
+
+    def update_from_page(self, result):
+        """合并目录页解析结果，返回书 id；不是目录页时返回 None"""
+        if not result:
+            return None
+        try:
+            page = json.loads(result)
+        except ValueError:
+            return None
+        # 同一地址重复出现时保留最后一次的位置
+        latest = {}
+        for position, (title, url) in enumerate(page["chapters"]):
+            latest[self.normalize(url)] = (position, title.strip())
+        found = [
+            (title, url)
+            for url, (_, title) in sorted(latest.items(), key=lambda item: item[1][0])
+        ]
+        if len(found) < self.MIN_CHAPTERS:
+            return None
+
+        toc_url = self.normalize(page["url"])
+        key = self.book_key(toc_url, [url for _, url in found])
+        book_id = next(
+            (i for i, book in self.books.items() if book["key"] == key), None
+        )
+        if book_id is None:
+            # 只有写线程写数据库，id 可以直接在内存中分配
+            book_id = max(self.books, default=0) + 1
+            self.books[book_id] = {
+                "key": key,
+                "title": page["title"] or toc_url,
+                "toc_url": toc_url,
+                "updated": time.time(),
+            }
+            self.chapters[book_id] = []
+            self.write(
+                self.insert_book_worker, book_id, dict(self.books[book_id])
+            )
+
+        # 增量合并：已有章节作为锚点，新章节插入到前一个锚点之后。
+        # 先按锚点收集新章节，再一次性拼接，整个合并是线性的
+        existing = self.chapters[book_id]
+        positions = {url: i for i, (_, url) in enumerate(existing)}
+        inserted = collections.defaultdict(list)  # 锚点位置（-1 为开头）-> 新章节
+        anchor = -1
+        for title, url in found:
+            if url in positions:
+                anchor = positions[url]
+            else:
+                inserted[anchor].append((title, url))
+        changed = bool(inserted)
+        if changed:
+            merged = list(inserted[-1])
+            for i, chapter in enumerate(existing):
+                merged.append(chapter)
+                merged.extend(inserted.get(i, ()))
+            self.chapters[book_id] = merged
+        else:
+            merged = existing
+
+        self.url_to_book[toc_url] = book_id
+        self.toc_urls.add(toc_url)
+        for _, url in merged:
+            self.url_to_book[url] = book_id
+        self.books[book_id]["updated"] = time.time()
+        self.books[book_id]["toc_url"] = toc_url
+        # 章节列表已被替换而不是原地修改，写线程可以直接读取
+        self.write(
+            self.update_book_worker,
+            book_id,
+            toc_url,
+            self.books[book_id]["updated"],
+            merged if changed else None,
+        )
+        return book_id
+
+    @staticmethod
+    def insert_book_worker(db, book_id, book):
+        db.execute(
+            "INSERT INTO books (id, key, title, toc_url, updated) VALUES (?, ?, ?, ?, ?)",
+            (book_id, book["key"], book["title"], book["toc_url"], book["updated"]),
+        )
+
+    @staticmethod
+    def update_book_worker(db, book_id, toc_url, updated, chapters):
+        db.execute(
+            "UPDATE books SET updated = ?, toc_url = ? WHERE id = ?",
+            (updated, toc_url, book_id),
+        )
+        if chapters is not None:
+            db.executemany(
+                "INSERT INTO chapters (book_id, position, title, url) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT (book_id, url) "
+                "DO UPDATE SET position = excluded.position, title = excluded.title",
+                [
+                    (book_id, position, title, url)
+                    for position, (title, url) in enumerate(chapters)
+                ],
+            )
+
+    def book_for_url(self, url):
+        """当前页面所属的书；未知时返回最近更新的书"""
+        book_id = self.url_to_book.get(self.normalize(url))
+        if book_id is None and self.books:
+            book_id = max(self.books, key=lambda i: self.books[i]["updated"])
+        return book_id
+
+    def chapter_number(self, title):
+        match = self.CHAPTER_NUMBER_PATTERN.search(title)
+        if not match:
+            return None
+        return chinese_to_int(match.group(1) or match.group(2))
+
+    def search(self, book_id, query, current_url="", limit=20):
+        """按章节号或模糊标题查找章节，返回 [(标题, 地址)]"""
+        chapters = self.chapters.get(book_id, [])
+        query = query.strip()
+        if not query:
+            # 没有输入时显示当前章节附近的章节
+            current = self.normalize(current_url)
+            index = next(
+                (i for i, (_, url) in enumerate(chapters) if url == current), 0
+            )
+            start = max(0, index - limit // 2)
+            return chapters[start : start + limit]
+
+        # “437”“四百三十七”“第437章”都按章节号查找
+        number = chinese_to_int(re.sub(r"^第\s*|\s*[章节回话]$", "", query))
+        if number is not None:
+            exact = [c for c in chapters if self.chapter_number(c[0]) == number]
+            if exact:
+                return exact[:limit]
+            if 1 <= number <= len(chapters):
+                return [chapters[number - 1]]
+            return []
+
+        # 模糊匹配：包含查询串的优先，其次按子序列匹配，越紧凑越靠前
+        lowered = query.lower()
+        scored = []
+        for position, (title, url) in enumerate(chapters):
+            text = title.lower()
+            index = text.find(lowered)
+            if index >= 0:
+                scored.append((0, index, position, title, url))
+                continue
+            span = self.subsequence_span(lowered, text)
+            if span is not None:
+                scored.append((1, span, position, title, url))
+        scored.sort()
+        return [(title, url) for *_, title, url in scored[:limit]]
+
+    @staticmethod
+    def subsequence_span(query, text):
+        """查询串按顺序出现在文本中时返回跨度长度，否则返回 None"""
+        start = -1
+        index = -1
+        for char in query:
+            index = text.find(char, index + 1)
+            if index < 0:
+                return None
+            if start < 0:
+                start = index
+        return index - start
+
+
+class QuickJumpPalette(QFrame):
+    """章节快速跳转面板：输入章节号或标题，回车直接打开章节"""
+
+    def __init__(self, window, parent=None):
+        super().__init__(parent)
+        self.window = window  # MinimalBrowser
+        self.book_id = None
+        self.setObjectName("quickJumpPalette")
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 8, 8, 8)
+        layout.setSpacing(6)
+
+        self.book_label = QLabel(self)
+        self.book_label.setObjectName("quickJumpBook")
+        layout.addWidget(self.book_label)
+
+        self.input = QLineEdit(self)
+        self.input.setObjectName("quickJumpInput")
+        self.input.setPlaceholderText("输入章节号或标题，回车跳转")
+        self.input.textChanged.connect(self.update_results)
+        self.input.returnPressed.connect(self.jump_to_selected)
+        self.input.installEventFilter(self)
+        layout.addWidget(self.input)
+
+        self.results = QListWidget(self)
+        self.results.setObjectName("quickJumpResults")
+        self.results.itemActivated.connect(self.jump)
+        layout.addWidget(self.results)
+
+        self.hide()
+
+    def open(self):
+        """显示面板并定位到当前书"""
+        index = self.window.toc_index
+        self.book_id = index.book_for_url(self.window.browser.url().toString())
+        if self.book_id is None:
+            self.book_label.setText("还没有目录索引，请先打开书的目录页")
+        else:
+            book = index.books[self.book_id]
+            self.book_label.setText(
+                f"{book['title']}（{len(index.chapters[self.book_id])} 章）"
+            )
+        self.input.clear()
+        self.update_results("")
+        self.show()
+        self.raise_()
+        self.input.setFocus()
+
+    def update_results(self, text):
+        self.results.clear()
+        if self.book_id is None:
+            return
+        matches = self.window.toc_index.search(
+            self.book_id, text, self.window.browser.url().toString()
+        )
+        for title, url in matches:
+            item = QListWidgetItem(title)
+            item.setData(Qt.UserRole, url)
+            self.results.addItem(item)
+        if self.results.count():
+            self.results.setCurrentRow(0)
+
+    def jump_to_selected(self):
+        item = self.results.currentItem()
+        if item is not None:
+            self.jump(item)
+
+    def jump(self, item):
+        self.hide()
+        self.window.browser.load(QUrl(item.data(Qt.UserRole)))
+
+    def eventFilter(self, obj, event):
+        # 输入框中用上下键选择结果，Esc 关闭
+        if obj is self.input and event.type() == QEvent.KeyPress:
+            key = event.key()
+            if key == Qt.Key_Escape:
+                self.hide()
+                return True
+            if key in (Qt.Key_Up, Qt.Key_Down):
+                step = -1 if key == Qt.Key_Up else 1
+                row = self.results.currentRow() + step
+                if 0 <= row < self.results.count():
+                    self.results.setCurrentRow(row)
+                return True
+        return super().eventFilter(obj, event)
+
+
+class ThumbnailCache(QObject):
+    """页面缩略图缓存：磁盘 JPEG 文件 + 内存中已解码 QPixmap 的 LRU
+
+    缩放、编码和解码都在工作线程中用 QImage 完成，
+    只有 QImage -> QPixmap 的转换在界面线程进行。
+    """
+
+    THUMBNAIL_SIZE = QSize(120, 160)
+    MEMORY_ITEMS = 300  # 内存中保留的缩略图数量
+
+    pixmap_ready = pyqtSignal(str, QPixmap)  # 键, 缩略图
+    image_loaded = pyqtSignal(str, QImage)  # 工作线程 -> 界面线程
+
+    def __init__(self, cache_dir, parent=None):
+        super().__init__(parent)
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.pixmaps = collections.OrderedDict()  # 键 -> QPixmap
+        self.pending = set()  # 正在加载的键（只在界面线程访问）
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="Thumbnail"
+        )
+        self.image_loaded.connect(self.on_image_loaded)
+
+    def path(self, key):
+        return os.path.join(
+            self.cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".jpg"
+        )
+
+    def store(self, key, image):
+        """缩小并保存页面截图（image 为 QImage，可在工作线程中使用）"""
+        self.executor.submit(self.store_worker, key, image)
+
+    def store_worker(self, key, image):
+        thumbnail = image.scaled(
+            self.THUMBNAIL_SIZE, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation
+        ).copy(QRect(QPoint(0, 0), self.THUMBNAIL_SIZE))
+        if not thumbnail.save(self.path(key), "JPG", 80):
+            logging.error(f"Failed to save thumbnail for {key}")
+        self.image_loaded.emit(key, thumbnail)
+
+    def get(self, key):
+        """返回内存中的缩略图；不在内存中时在后台加载，完成后发出 pixmap_ready"""
+        pixmap = self.pixmaps.get(key)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(key)
+            return pixmap
+        if key not in self.pending:
+            self.pending.add(key)
+            self.executor.submit(self.load_worker, key)
+        return None
+
+    def peek(self, key):
+        """只查看内存中的缩略图，不调整淘汰顺序也不加载"""
+        return self.pixmaps.get(key)
+
+    def load_worker(self, key):
+        image = QImage(self.path(key))
+        # 文件不存在时也通知界面线程，清除 pending 标记
+        self.image_loaded.emit(key, image)
+
+    def on_image_loaded(self, key, image):
+        self.pending.discard(key)
+        if image.isNull():
+            return
+        pixmap = QPixmap.fromImage(image)
+        self.pixmaps[key] = pixmap
+        self.pixmaps.move_to_end(key)
+        while len(self.pixmaps) > self.MEMORY_ITEMS:
+            self.pixmaps.popitem(last=False)
+        self.pixmap_ready.emit(key, pixmap)
+
+    def remove(self, key):
+        self.pixmaps.pop(key, None)
+        try:
+            os.remove(self.path(key))
+        except OSError:
+            pass
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+
+class Bookshelf:
+    """最近阅读的书：书 -> 最后阅读的章节地址
+
+    书的标识与 TocIndex 相同，记录保存在目录索引数据库中，
+    写入通过 TocIndex 的写线程进行。
+    只记录章节页：目录索引中的章节，或标题像章节/有下一章链接的页面；
+    后者以页面上的目录链接确定所属的书，目录尚未建立索引时以目录页地址为标识。
+    """
+
+    MAX_BOOKS = 500
+
+    # 页面是否有下一章链接，以及页面上的目录链接
+    PAGE_INFO_JS = """
+        (function() {
+            var next = !!document.querySelector('link[rel="next"], a[rel="next"]');
+            var toc = '';
+            var anchors = document.querySelectorAll('a[href]');
+            for (var i = 0; i < anchors.length; i++) {
+                var text = anchors[i].textContent.trim();
+                if (text.length > 20) {
+                    continue;
+                }
+                if (!next && /下一章|下一页|下章|下一节|下一篇/.test(text)) {
+                    next = true;
+                }
+                if (!toc && /目录|章节列表|返回书页/.test(text)) {
+                    toc = anchors[i].href.split('#')[0];
+                }
+            }
+            return JSON.stringify({next: next, toc: toc});
+        })();
+    """
+
+    def __init__(self, toc_index):
+        self.toc_index = toc_index
+        db = sqlite3.connect(toc_index.db_path)
+        db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS shelf (
+                key TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                url TEXT NOT NULL,
+                chapter TEXT NOT NULL,
+                read_at REAL NOT NULL
+            )
+            """
+        )
+        self.books = collections.OrderedDict()  # 键 -> 记录，最近阅读的在前
+        self.merged = []  # 已并入其他条目、等待 prune() 报告的键
+        try:
+            for key, title, url, chapter, read_at in db.execute(
+                "SELECT key, title, url, chapter, read_at FROM shelf ORDER BY read_at DESC"
+            ):
+                self.books[key] = {
+                    "title": title,
+                    "url": url,
+                    "chapter": chapter,
+                    "read_at": read_at,
+                }
+        finally:
+            db.close()
+
+    def book_key(self, url, page_title, page_info):
+        """章节地址 -> (书的标识, 书 id)；不像章节页时返回 (None, None)
+
+        page_info 为 PAGE_INFO_JS 的结果，书 id 在目录未建立索引时为 None。
+        """
+        url = TocIndex.normalize(url)
+        if url in self.toc_index.toc_urls:
+            return None, None
+        book_id = self.toc_index.url_to_book.get(url)
+        if book_id is None:
+            try:
+                info = json.loads(page_info or "{}")
+            except ValueError:
+                return None, None
+            chapter_like = info.get("next") or TocIndex.CHAPTER_NUMBER_PATTERN.search(
+                page_title or ""
+            )
+            toc_url = TocIndex.normalize(info.get("toc") or "")
+            if not chapter_like or not toc_url or toc_url == url:
+                return None, None
+            book_id = self.toc_index.url_to_book.get(toc_url)
+            if book_id is None:
+                return toc_url, None
+        return self.toc_index.books[book_id]["key"], book_id
+
+    def record(self, url, page_title, page_info):
+        """记录阅读位置，返回书的标识；不是章节页时不记录，返回 None"""
+        key, book_id = self.book_key(url, page_title, page_info)
+        if key is None:
+            return None
+        if book_id is not None:
+            book = self.toc_index.books[book_id]
+            title = book["title"]
+            # 目录建立索引之前以目录页地址记录的条目并入这本书
+            if book["toc_url"] != key and book["toc_url"] in self.books:
+                del self.books[book["toc_url"]]
+                self.merged.append(book["toc_url"])
+        elif key in self.books:
+            title = self.books[key]["title"]
+        else:
+            title = page_title or url
+        record = {
+            "title": title,
+            "url": url,
+            "chapter": page_title or url,
+            "read_at": time.time(),
+        }
+        self.books[key] = record
+        self.books.move_to_end(key, last=False)
+        self.toc_index.write(
+            lambda db: db.execute(
+                "INSERT OR REPLACE INTO shelf (key, title, url, chapter, read_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, record["title"], url, record["chapter"], record["read_at"]),
+            )
+        )
+        return key
+
+    def prune(self):
+        """删除已并入其他条目的书，超出数量上限时删除最久未读的书，返回被删除的键"""
+        removed = self.merged + list(self.books)[self.MAX_BOOKS :]
+        self.merged = []
+        for key in removed:
+            self.books.pop(key, None)
+        if removed:
+            self.toc_index.write(
+                lambda db: db.executemany(
+                    "DELETE FROM shelf WHERE key = ?", [(key,) for key in removed]
+                )
+            )
+        return removed
+
+
+class BookshelfPanel(QFrame):
+    """书架浮层：按最近阅读排列的书和最后一页的缩略图，点击直接打开"""
+
+    def __init__(self, window, parent=None):
+        super().__init__(parent)
+        self.window = window  # MinimalBrowser
+        self.items = {}  # 书的标识 -> QListWidgetItem
+        self.setObjectName("bookshelfPanel")
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(12, 12, 12, 12)
+        layout.setSpacing(8)
+
+        header = QLabel("最近阅读", self)
+        header.setObjectName("bookshelfHeader")
+        layout.addWidget(header)
+
+        self.list = QListWidget(self)
+        self.list.setObjectName("bookshelfList")
+        self.list.setViewMode(QListWidget.IconMode)
+        self.list.setResizeMode(QListWidget.Adjust)
+        self.list.setMovement(QListWidget.Static)
+        self.list.setUniformItemSizes(True)
+        self.list.setWordWrap(True)
+        self.list.setIconSize(ThumbnailCache.THUMBNAIL_SIZE)
+        self.list.setGridSize(QSize(150, 220))
+        self.list.itemClicked.connect(self.open_book)
+        self.list.itemActivated.connect(self.open_book)
+        self.list.installEventFilter(self)
+        # 只为可见的书加载缩略图，滚动时加载新露出的
+        self.list.verticalScrollBar().valueChanged.connect(self.load_visible)
+        layout.addWidget(self.list)
+
+        # 状态信息（本地字体节省的下载量、网站存储用量）
+        self.status = QLabel(self)
+        self.status.setObjectName("bookshelfStatus")
+        self.status.setWordWrap(True)
+        layout.addWidget(self.status)
+
+        # 没有缩略图时的占位图
+        self.placeholder = QPixmap(ThumbnailCache.THUMBNAIL_SIZE)
+        self.placeholder.fill(QColor(235, 235, 235))
+
+        window.thumbnails.pixmap_ready.connect(self.on_pixmap_ready)
+        self.hide()
+
+    def open(self):
+        """显示书架（缩略图在内存中的直接显示，可见的其余缩略图在后台加载）
+
+        缓存容量小于书架上限，逐个 get() 全部书会让后面的书把最近阅读的
+        挤出缓存；这里只用 peek() 填充，再对可见的书调用 get()。
+        """
+        self.status.setText(
+            self.window.local_fonts.report()
+            + "\n"
+            + self.window.storage_manager.usage_report()
+        )
+        self.list.clear()
+        self.items = {}
+        thumbnails = self.window.thumbnails
+        for key, book in self.window.bookshelf.books.items():
+            item = QListWidgetItem(book["title"])
+            item.setToolTip(book["chapter"])
+            item.setData(Qt.UserRole, book["url"])
+            pixmap = thumbnails.peek(key)
+            item.setIcon(QIcon(pixmap if pixmap is not None else self.placeholder))
+            self.list.addItem(item)
+            self.items[key] = item
+        self.show()
+        self.raise_()
+        self.list.setFocus()
+        # 等布局完成后再计算可见范围
+        QTimer.singleShot(0, self.load_visible)
+
+    def load_visible(self):
+        """对可见的书请求缩略图（已在内存中的直接显示并更新淘汰顺序）"""
+        if not self.isVisible():
+            return
+        viewport = self.list.viewport().rect()
+        thumbnails = self.window.thumbnails
+        for key, item in self.items.items():
+            if not self.list.visualItemRect(item).intersects(viewport):
+                continue
+            pixmap = thumbnails.get(key)
+            if pixmap is not None:
+                item.setIcon(QIcon(pixmap))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.load_visible()
+
+    def on_pixmap_ready(self, key, pixmap):
+        item = self.items.get(key)
+        if item is not None and self.isVisible():
+            item.setIcon(QIcon(pixmap))
+
+    def open_book(self, item):
+        self.hide()
+        self.window.browser.load(QUrl(item.data(Qt.UserRole)))
+
+    def eventFilter(self, obj, event):
+        # Esc 关闭书架
+        if obj is self.list and event.type() == QEvent.KeyPress:
+            if event.key() == Qt.Key_Escape:
+                self.hide()
+                return True
+        return super().eventFilter(obj, event)
+
+
+def available_memory_mb():
+    """返回系统可用内存（MB），无法获取时返回 None"""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+
+            class MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [
+                    ("dwLength", ctypes.c_ulong),
+                    ("dwMemoryLoad", ctypes.c_ulong),
+                    ("ullTotalPhys", ctypes.c_ulonglong),
+                    ("ullAvailPhys", ctypes.c_ulonglong),
+                    ("ullTotalPageFile", ctypes.c_ulonglong),
+                    ("ullAvailPageFile", ctypes.c_ulonglong),
+                    ("ullTotalVirtual", ctypes.c_ulonglong),
+                    ("ullAvailVirtual", ctypes.c_ulonglong),
+                    ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+                ]
+
+            status = MEMORYSTATUSEX()
+            status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return status.ullAvailPhys // (1024 * 1024)
+            return None
+        with open("/proc/meminfo", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, AttributeError):
+        pass
+    return None
+
+
+class ChapterBuffer(QObject):
+    """章节双缓冲：在隐藏页面中预加载下一章，翻页时直接切换页面
+
+    当前页面加载完成后从页面中查找“下一章”链接，用同一配置文件上的第二个
+    CustomWebEnginePage 在后台加载。读者点击该链接时拦截导航，
+    用 setPage 切换到已渲染好的页面，原页面回收作为下一次的缓冲页。
+    系统可用内存不足时释放缓冲页。
+    """
+
+    MIN_AVAILABLE_MEMORY_MB = 512  # 低于此可用内存时释放缓冲页
+    MEMORY_CHECK_INTERVAL = 10000  # 内存检查间隔（毫秒）
+
+    NEXT_CHAPTER_JS = """
+        (function() {
+            var rel = document.querySelector('link[rel="next"], a[rel="next"]');
+            if (rel && rel.href) {
+                return rel.href;
+            }
+            var keywords = ['下一章', '下一页', '下章', '下一节', '下一篇'];
+            var anchors = document.querySelectorAll('a[href]');
+            for (var i = 0; i < anchors.length; i++) {
+                var text = anchors[i].textContent.trim();
+                if (text.length > 20) {
+                    continue;
+                }
+                for (var j = 0; j < keywords.length; j++) {
+                    if (text.indexOf(keywords[j]) !== -1) {
+                        return anchors[i].href;
+                    }
+                }
+            }
+            return '';
+        })();
+    """
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.window = window  # MinimalBrowser
+        self.page = None  # 缓冲页面
+        self.url = QUrl()  # 缓冲页面正在加载/已加载的地址
+        self.ready = False  # 缓冲页面是否加载完成
+        self.enabled = True
+
+        self.memory_timer = QTimer(self)
+        self.memory_timer.timeout.connect(self.check_memory)
+        self.memory_timer.start(self.MEMORY_CHECK_INTERVAL)
+
+    @staticmethod
+    def normalize(url):
+        """比较地址时忽略片段和末尾斜杠"""
+        return url.adjusted(QUrl.RemoveFragment | QUrl.StripTrailingSlash)
+
+    def register_page(self, page):
+        """为页面安装导航拦截和加载完成处理（每个页面只调用一次）"""
+        page.navigation_filter = self.window.intercept_navigation
+        page.loadFinished.connect(lambda ok: self.on_page_loaded(page, ok))
+
+    def memory_low(self):
+        available = available_memory_mb()
+        return available is not None and available < self.MIN_AVAILABLE_MEMORY_MB
+
+    def check_memory(self):
+        if self.page is not None and self.memory_low():
+            self.drop()
+
+    def drop(self):
+        """释放缓冲页面"""
+        if self.page is not None and not sip.isdeleted(self.page):
+            sip.delete(self.page)
+        self.page = None
+        self.url = QUrl()
+        self.ready = False
+
+    def prefetch(self, current_page):
+        """查找当前页面的下一章链接并在缓冲页面中加载"""
+        if not self.enabled or self.memory_low():
+            return
+        current_page.runJavaScript(
+            self.NEXT_CHAPTER_JS,
+            lambda href: self.on_next_chapter_found(current_page, href),
+        )
+
+    def on_next_chapter_found(self, current_page, href):
+        if not href or sip.isdeleted(current_page):
+            return
+        url = QUrl(href)
+        current_url = current_page.url()
+        # 只预加载同一站点的章节
+        if (
+            not url.isValid()
+            or url.scheme() not in ("http", "https")
+            or url.host() != current_url.host()
+            or self.normalize(url) == self.normalize(current_url)
+            or self.normalize(url) == self.normalize(self.url)
+        ):
+            return
+        if self.page is None:
+            self.page = CustomWebEnginePage(self.window.profile, self.window)
+            self.register_page(self.page)
+        self.url = url
+        self.ready = False
+        self.page.load(url)
+
+    def on_page_loaded(self, page, ok):
+        if page is self.page:
+            self.ready = ok
+            if ok:
+                # 回收的页面还保留着以前显示时的历史记录，只保留预加载的章节，
+                # 切换前的章节由 MinimalBrowser.swap_history/swap_forward 按顺序记录
+                page.history().clear()
+        self.window.on_load_finished(ok, page)
+
+    def matches(self, url):
+        """缓冲页面是否已加载好该地址"""
+        return (
+            self.page is not None
+            and self.ready
+            and self.normalize(url) == self.normalize(self.url)
+        )
+
+    def take(self, visible_page):
+        """取出缓冲页面用于显示，原显示页面回收为新的缓冲页面"""
+        page = self.page
+        self.page = visible_page
+        self.page.history().clear()
+        self.url = QUrl()
+        self.ready = False
+        return page
+
+
+class JobCancelled(Exception):
+    """维护任务被用户输入取消或超出预算"""
+
+
+class JobContext:
+    """维护任务的运行上下文，任务需要定期调用 check() 以便及时停止"""
+
+    def __init__(self, time_budget, cpu_budget):
+        self.cancel_event = threading.Event()
+        self.reason = None
+        self.time_budget = time_budget
+        self.cpu_budget = cpu_budget
+        self.started = time.monotonic()
+        # thread_time() 只能测量当前线程，每个线程各自记录起点
+        self.cpu_started = {}  # 线程 id -> 起始 CPU 时间
+        self.cpu_used = 0.0  # 已结束计时的线程用掉的 CPU 时间
+
+    def cancel(self, reason):
+        self.reason = reason
+        self.cancel_event.set()
+
+    def start_cpu(self):
+        """开始统计当前线程的 CPU 时间"""
+        self.cpu_started[threading.get_ident()] = time.thread_time()
+
+    def stop_cpu(self):
+        """结束统计当前线程的 CPU 时间，计入总量"""
+        started = self.cpu_started.pop(threading.get_ident(), None)
+        if started is not None:
+            self.cpu_used += time.thread_time() - started
+
+    def cpu_time(self):
+        """已结束计时的线程加上当前线程到目前为止的 CPU 时间"""
+        started = self.cpu_started.get(threading.get_ident())
+        if started is None:
+            return self.cpu_used
+        return self.cpu_used + time.thread_time() - started
+
+    def check(self):
+        """已取消或超出时间/CPU 预算时抛出 JobCancelled"""
+        if self.cancel_event.is_set():
+            raise JobCancelled(self.reason)
+        if time.monotonic() - self.started > self.time_budget:
+            raise JobCancelled("time budget exceeded")
+        if self.cpu_time() > self.cpu_budget:
+            raise JobCancelled("cpu budget exceeded")
+
+
+def system_idle_seconds():
+    """返回系统距上次键盘/鼠标输入的秒数，无法获取时返回 None"""
+    if sys.platform != "win32":
+        return None
+    try:
+        import ctypes
+
+        class LASTINPUTINFO(ctypes.Structure):
+            _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_ulong)]
+
+        info = LASTINPUTINFO()
+        info.cbSize = ctypes.sizeof(LASTINPUTINFO)
+        if not ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+            return None
+        # GetTickCount 约 49.7 天回绕一次，按 32 位无符号数相减
+        elapsed = (ctypes.windll.kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF
+        return elapsed / 1000
+    except (OSError, AttributeError):
+        return None
+
+
+class MaintenanceScheduler(QObject):
+    """空闲时运行后台维护任务
+
+    用户一段时间没有输入后，才在线程池中依次运行到期的维护任务；
+    键盘/鼠标输入会取消正在运行的任务（任务在下一个空闲期重新运行）。
+    每个任务有各自的时间和 CPU 预算，运行情况可通过 status() 查询。
+    Windows 上在每次 tick 中查询系统空闲时间，不在界面线程中处理任何事件；
+    其他平台只过滤 watch() 登记的控件（主窗口、网页视图）的输入事件，
+    不安装应用程序级的事件过滤器。
+    """
+
+    IDLE_SECONDS = 30  # 无输入多久后视为空闲
+    TICK_INTERVAL = 1000  # 检查间隔（毫秒）
+
+    USER_INPUT_EVENTS = frozenset(
+        (
+            QEvent.KeyPress,
+            QEvent.MouseButtonPress,
+            QEvent.MouseButtonDblClick,
+            QEvent.MouseMove,
+            QEvent.Wheel,
+            QEvent.TouchBegin,
+        )
+    )
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = {}  # 名称 -> 任务信息
+        self.lock = threading.Lock()
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="Maintenance"
+        )
+        self.last_input = time.monotonic()
+        self.running = None  # (名称, JobContext, Future)
+        self.watched = []  # 安装了事件过滤器的控件
+
+        self.tick_timer = QTimer(self)
+        self.tick_timer.timeout.connect(self.tick)
+        self.tick_timer.start(self.TICK_INTERVAL)
+
+    def add_job(self, name, func, interval, time_budget=5.0, cpu_budget=2.0):
+        """注册维护任务：func(context) 每隔 interval 秒在空闲时运行一次"""
+        self.jobs[name] = {
+            "func": func,
+            "interval": interval,
+            "time_budget": time_budget,
+            "cpu_budget": cpu_budget,
+            "next_run": time.monotonic(),
+            "runs": 0,
+            "cancellations": 0,
+            "last_run": None,
+            "last_duration": None,
+            "last_cpu": None,
+            "last_result": None,
+        }
+
+    def watch(self, widget):
+        """监视控件的输入事件（能查询系统空闲时间时不需要）"""
+        if widget is None or widget in self.watched or system_idle_seconds() is not None:
+            return
+        widget.installEventFilter(self)
+        self.watched.append(widget)
+        widget.destroyed.connect(lambda: self.unwatch(widget))
+
+    def unwatch(self, widget):
+        if widget in self.watched:
+            self.watched.remove(widget)
+
+    def eventFilter(self, obj, event):
+        if event.type() in self.USER_INPUT_EVENTS:
+            self.last_input = time.monotonic()
+            if self.running is not None:
+                self.running[1].cancel("user input")
+        return False
+
+    def is_idle(self):
+        return time.monotonic() - self.last_input >= self.IDLE_SECONDS
+
+    def tick(self):
+        """空闲且没有任务在运行时，启动下一个到期的任务"""
+        idle = system_idle_seconds()
+        if idle is not None:
+            self.last_input = max(self.last_input, time.monotonic() - idle)
+            # 任务只在空闲时启动，运行期间空闲时间变短说明有输入（最多延迟一次 tick）
+            if self.running is not None and idle < self.IDLE_SECONDS:
+                self.running[1].cancel("user input")
+        if self.running is not None:
+            if not self.running[2].done():
+                return
+            self.running = None
+        if not self.is_idle():
+            return
+        now = time.monotonic()
+        due = [name for name, job in self.jobs.items() if job["next_run"] <= now]
+        if not due:
+            return
+        name = min(due, key=lambda n: self.jobs[n]["next_run"])
+        job = self.jobs[name]
+        context = JobContext(job["time_budget"], job["cpu_budget"])
+        future = self.executor.submit(self.run_job, name, job, context)
+        self.running = (name, context, future)
+
+    def run_job(self, name, job, context):
+        """在工作线程中运行任务并记录耗时"""
+        context.start_cpu()
+        try:
+            result = job["func"](context)
+        except JobCancelled as e:
+            result = f"cancelled: {e}"
+        except Exception as e:
+            logging.error(f"Maintenance job {name} failed: {e}")
+            result = f"failed: {e}"
+
+        with self.lock:
+            job["last_run"] = time.time()
+            job["last_duration"] = time.monotonic() - context.started
+            job["last_cpu"] = context.cpu_time()
+            job["last_result"] = result
+            if context.cancel_event.is_set():
+                # 被用户输入打断的任务在下一个空闲期重新运行
+                job["cancellations"] += 1
+            else:
+                # 完成、出错或超出预算的任务都等到下个周期，避免反复占用空闲时间
+                job["runs"] += 1
+                job["next_run"] = time.monotonic() + job["interval"]
+
+    def status(self):
+        """返回各任务的运行情况"""
+        running = self.running[0] if self.running is not None else None
+        with self.lock:
+            return [
+                {
+                    "name": name,
+                    "running": name == running,
+                    "runs": job["runs"],
+                    "cancellations": job["cancellations"],
+                    "last_run": job["last_run"],
+                    "last_duration": job["last_duration"],
+                    "last_cpu": job["last_cpu"],
+                    "last_result": job["last_result"],
+                    "next_run_in": max(0.0, job["next_run"] - time.monotonic()),
+                }
+                for name, job in self.jobs.items()
+            ]
+
+    def shutdown(self):
+        """退出时取消正在运行的任务，不等待其结束"""
+        self.tick_timer.stop()
+        for widget in self.watched:
+            if not sip.isdeleted(widget):
+                widget.removeEventFilter(self)
+        self.watched = []
+        if self.running is not None:
+            self.running[1].cancel("shutdown")
+        self.executor.shutdown(wait=False)
+
+
+def rotate_logs(paths, max_bytes, context):
+    """日志超过大小时把内容移到 .1 文件并清空（日志处理器以追加方式打开，可以直接截断）"""
+    rotated = []
+    for path in paths:
+        context.check()
+        try:
+            if os.path.getsize(path) <= max_bytes:
+                continue
+            shutil.copyfile(path, path + ".1")
+            with open(path, "r+b") as f:
+                f.truncate(0)
+        except OSError:
+            continue
+        rotated.append(os.path.basename(path))
+    return f"rotated {len(rotated)} log(s)"
+
+
 class MinimalBrowser(QWidget):
-    def __init__(self, target_url):
+    def __init__(self, target_url, network_capture=False):
         super().__init__()
         self.target_url = target_url
         self.is_fullscreen = False  # 跟踪全屏状态
@@ -314,15 +2716,6 @@ class MinimalBrowser(QWidget):
         # 创建圆角内容框架
         self.content_frame = QFrame(self)
         self.content_frame.setObjectName("contentFrame")
-        self.content_frame.setStyleSheet(
-            """
-            #contentFrame {
-                background-color: white;
-                border-radius: 8px;
-                border: 1px solid #e0e0e0;
-            }
-        """
-        )
         self.main_layout.addWidget(self.content_frame)
 
         # 创建内容布局
@@ -335,6 +2728,10 @@ class MinimalBrowser(QWidget):
         if not os.path.exists(self.profile_path):
             os.makedirs(self.profile_path)
 
+        # 在配置文件打开存储之前执行存储配额
+        self.storage_manager = StorageManager(self.profile_path)
+        self.storage_manager.enforce()
+
         # 创建配置文件
         self.profile = QWebEngineProfile("CustomProfile", self)
         self.profile.setPersistentCookiesPolicy(
@@ -346,9 +2743,41 @@ class MinimalBrowser(QWidget):
         # 设置语言首选项为中文
         self.profile.setHttpAcceptLanguage("zh-CN,zh;q=0.9,en;q=0.8")
 
+        # 请求拦截器（依次执行本地字体重定向、网络采集）
+        self.request_interceptor = ChainedRequestInterceptor(self)
+        self.profile.setUrlRequestInterceptor(self.request_interceptor)
+
+        # 本地 CJK 字体，避免每次等待网页字体下载
+        self.local_fonts = LocalFonts(
+            self.profile,
+            self.request_interceptor,
+            os.path.join(self.profile_path, "font_cache"),
+            self,
+        )
+
+        # 网络采集模式：记录每个资源的请求和耗时并导出 HAR
+        self.network_capture = None
+        if network_capture:
+            self.network_capture = NetworkCapture(
+                self.profile,
+                self.request_interceptor,
+                os.path.join(os.getcwd(), "network_capture"),
+                self,
+            )
+
         # 创建自定义页面
         self.page = CustomWebEnginePage(self.profile, self)
 
+        # 章节双缓冲（网络采集模式下关闭，避免两个页面的请求混在一起）
+        self.chapter_buffer = ChapterBuffer(self)
+        self.chapter_buffer.enabled = not network_capture
+        self.chapter_buffer.register_page(self.page)
+        # 切换缓冲页面后，原页面的历史不在当前页面中，由这两个栈记录：
+        # 元素为 (地址, 滚动位置或 None)，栈顶是最近的一项
+        self.swap_history = []  # 后退栈（由旧到新）
+        self.swap_forward = []  # 前进栈（由远到近）
+        self.pending_restore = None  # 正在从栈中恢复的 (地址, 滚动位置)
+
         # 创建浏览器视图
         self.browser = QWebEngineView(self)
         self.browser.setPage(self.page)
@@ -360,18 +2789,76 @@ class MinimalBrowser(QWidget):
         self.title_bar.raise_()  # 确保标题栏在最上层
         self.title_bar.hide()  # 初始隐藏
 
+        # 本地目录索引与章节快速跳转面板（Ctrl+G 显示/隐藏）
+        self.toc_index = TocIndex(os.path.join(self.profile_path, "toc_index.db"))
+        self.quick_jump = QuickJumpPalette(self, self.content_frame)
+        self.quick_jump_shortcut = QShortcut(QKeySequence("Ctrl+G"), self)
+        self.quick_jump_shortcut.activated.connect(self.toggle_quick_jump)
+
+        # 书架与页面缩略图（Ctrl+B 显示/隐藏）
+        self.bookshelf = Bookshelf(self.toc_index)
+        self.thumbnails = ThumbnailCache(
+            os.path.join(self.profile_path, "thumbnails"), self
+        )
+        self.bookshelf_panel = BookshelfPanel(self, self.content_frame)
+        self.bookshelf_shortcut = QShortcut(QKeySequence("Ctrl+B"), self)
+        self.bookshelf_shortcut.activated.connect(self.toggle_bookshelf)
+
+        # 空闲时运行的后台维护任务
+        self.maintenance = MaintenanceScheduler(self)
+        self.maintenance.watch(self)
+        self.maintenance.add_job(
+            "rotate_logs",
+            functools.partial(
+                rotate_logs,
+                [
+                    os.path.join(os.getcwd(), "browser_error.log"),
+                    os.path.join(os.getcwd(), "diagnostics.log"),
+                ],
+                1024 * 1024,
+            ),
+            interval=3600,
+        )
+        self.maintenance.add_job(
+            "trim_font_cache", self.local_fonts.trim_cache, interval=6 * 3600
+        )
+        self.maintenance.add_job(
+            "compact_toc_index", self.toc_index.compact, interval=24 * 3600
+        )
+        if self.network_capture:
+            self.maintenance.add_job(
+                "prune_network_captures",
+                self.network_capture.prune_captures,
+                interval=3600,
+            )
+
+        # 网络采集摘要浮层（F12 显示/隐藏）
+        if self.network_capture:
+            self.network_summary = NetworkSummaryPanel(self.content_frame)
+            self.network_summary_shortcut = QShortcut(QKeySequence("F12"), self)
+            self.network_summary_shortcut.activated.connect(
+                self.toggle_network_summary
+            )
+
         # 配置浏览器设置
         self.configure_browser()
 
         # 加载目标网址
         self.browser.load(QUrl(self.target_url))
 
-        # 连接加载完成信号
-        self.browser.loadFinished.connect(self.on_load_finished)
+        # 连接加载完成信号（各页面的 on_load_finished 由 chapter_buffer 调用）
+        self.browser.loadFinished.connect(self.on_view_load_finished)
+        if self.network_capture:
+            self.browser.loadFinished.connect(
+                lambda ok: self.network_capture.schedule_collect(self.browser.page())
+            )
 
         # 设置窗口标题变化事件
         self.browser.titleChanged.connect(self.update_window_title)
 
+        # 记录访问的源，用于存储淘汰顺序
+        self.browser.urlChanged.connect(self.storage_manager.record_visit)
+
         # 鼠标移动检测定时器
         self.mouse_timer = QTimer(self)
         self.mouse_timer.timeout.connect(self.check_mouse_position)
@@ -387,7 +2874,6 @@ class MinimalBrowser(QWidget):
 
         # 创建右下角大小拖拽手柄（只保留这一个）
         self.size_grip = QSizeGrip(self)
-        self.size_grip.setStyleSheet("background-color: transparent;")  # 透明背景
         self.size_grip.raise_()  # 确保在最上层
 
     def get_icon(self, filename):
@@ -417,7 +2903,8 @@ class MinimalBrowser(QWidget):
 
     def configure_browser(self):
         """配置浏览器设置"""
-        settings = self.browser.settings()
+        # 设置在配置文件上，缓冲页面等所有页面都继承这些设置
+        settings = self.profile.settings()
 
         # 启用所有必要功能
         settings.setAttribute(QWebEngineSettings.JavascriptEnabled, True)
@@ -426,27 +2913,6 @@ class MinimalBrowser(QWidget):
         settings.setAttribute(QWebEngineSettings.WebGLEnabled, True)
         settings.setAttribute(QWebEngineSettings.Accelerated2dCanvasEnabled, True)
 
-        # 隐藏滚动条但保留滚动功能
-        self.browser.setStyleSheet(
-            """
-            QWebEngineView {
-                border: none;
-            }
-            QScrollBar:vertical {
-                width: 0px;
-            }
-            QScrollBar:horizontal {
-                height: 0px;
-            }
-            QScrollBar::handle:vertical {
-                width: 0px;
-            }
-            QScrollBar::handle:horizontal {
-                height: 0px;
-            }
-        """
-        )
-
         # 注入CSS隐藏网页滚动条但保留滚动功能
         hide_scrollbar_js = """
             // 保留滚动功能但隐藏滚动条
@@ -509,10 +2975,57 @@ class MinimalBrowser(QWidget):
         self.title_bar.title.setText(title)
         self.setWindowTitle(title)
 
-    def on_load_finished(self, success):
+    def on_view_load_finished(self, success):
+        """显示页面加载完成后更新目录索引并预加载下一章"""
+        if self.pending_restore is not None:
+            _, scroll_y = self.pending_restore
+            self.pending_restore = None
+            if success:
+                # 页面历史只保留恢复的这一项，其余在后退/前进栈中
+                self.page.history().clear()
+                if scroll_y:
+                    self.page.runJavaScript(f"window.scrollTo(0, {scroll_y});")
+        if success:
+            self.page.runJavaScript(
+                TocIndex.EXTRACT_TOC_JS, self.toc_index.update_from_page
+            )
+            self.chapter_buffer.prefetch(self.page)
+            self.local_fonts.start_precache(self.profile.httpUserAgent())
+            self.on_page_shown()
+
+    def on_page_shown(self):
+        """页面显示后记录阅读位置，稍后截取缩略图"""
+        # 切换页面后网页视图的输入由新的焦点代理控件接收
+        self.maintenance.watch(self.browser.focusProxy())
+        # 目录提取在此之前提交，回调按顺序执行，记录时目录索引已经更新
+        page = self.page
+        url = page.url().toString()
+        page.runJavaScript(
+            Bookshelf.PAGE_INFO_JS, lambda info: self.on_page_info(page, url, info)
+        )
+
+    def on_page_info(self, page, url, info):
+        # 页面已被换掉或已跳转到别处时不再记录
+        if page is not self.page or page.url().toString() != url:
+            return
+        key = self.bookshelf.record(url, page.title(), info)
+        if key is None:
+            return
+        for removed in self.bookshelf.prune():
+            self.thumbnails.remove(removed)
+        # 等页面完成绘制后再截图
+        QTimer.singleShot(800, lambda: self.capture_thumbnail(key, url))
+
+    def capture_thumbnail(self, key, url):
+        """截取当前页面作为书的缩略图（缩放和保存在后台进行）"""
+        if self.browser is None or self.page.url().toString() != url:
+            return
+        self.thumbnails.store(key, self.browser.grab().toImage())
+
+    def on_load_finished(self, success, page):
         if success:
             # 设置中文语言环境
-            self.browser.page().runJavaScript(
+            page.runJavaScript(
                 """
                 if (navigator.language) {
                     document.documentElement.lang = 'zh-CN';
@@ -577,7 +3090,7 @@ class MinimalBrowser(QWidget):
             pass
 
         # 连接全屏请求信号
-        self.page.fullScreenRequested.connect(self.handle_fullscreen_request)
+        page.fullScreenRequested.connect(self.handle_fullscreen_request)
 
     def handle_fullscreen_request(self, request):
         """处理HTML5全屏API请求"""
@@ -641,19 +3154,32 @@ class MinimalBrowser(QWidget):
             if self.mouse_in_top_area:
                 self.mouse_in_top_area = False
                 self.title_bar_timer.stop()
-                self.title_bar.hide()
+                self.title_bar.fade_out()
 
     def show_title_bar_after_delay(self):
         """延迟后显示标题栏"""
         if self.mouse_in_top_area:  # 确保鼠标仍在顶部区域
-            self.title_bar.show()
-            self.title_bar.raise_()  # 确保标题栏在最上层
+            self.title_bar.fade_in()  # 淡入并确保标题栏在最上层
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
         # 更新标题栏位置和大小
         self.title_bar.setGeometry(0, 0, self.content_frame.width(), 32)
-        
+        palette_width = min(480, self.content_frame.width() - 32)
+        self.quick_jump.setGeometry(
+            (self.content_frame.width() - palette_width) // 2,
+            40,
+            palette_width,
+            min(420, self.content_frame.height() - 60),
+        )
+        self.bookshelf_panel.setGeometry(
+            self.content_frame.rect().adjusted(40, 40, -40, -40)
+        )
+        if self.network_capture:
+            self.network_summary.setGeometry(
+                self.content_frame.rect().adjusted(40, 40, -40, -40)
+            )
+
         # 定位右下角大小拖拽手柄
         size = 16
         if not self.is_fullscreen:  # 只在非全屏模式下显示
@@ -664,15 +3190,109 @@ class MinimalBrowser(QWidget):
         else:
             self.size_grip.hide()
 
+    def toggle_quick_jump(self):
+        """显示/隐藏章节快速跳转面板"""
+        if self.quick_jump.isVisible():
+            self.quick_jump.hide()
+        else:
+            self.bookshelf_panel.hide()
+            self.quick_jump.open()
+
+    def toggle_bookshelf(self):
+        """显示/隐藏书架"""
+        if self.bookshelf_panel.isVisible():
+            self.bookshelf_panel.hide()
+        else:
+            self.quick_jump.hide()
+            self.bookshelf_panel.open()
+
+    def toggle_network_summary(self):
+        """显示/隐藏网络采集摘要"""
+        if self.network_summary.isVisible():
+            self.network_summary.hide()
+        else:
+            self.network_summary.set_summary(
+                self.network_capture.summary + "\n\n" + self.local_fonts.report()
+            )
+            self.network_summary.show()
+            self.network_summary.raise_()
+
+    def intercept_navigation(self, page, url, type):
+        """显示页面跳转到已预加载的章节时，取消导航并切换到缓冲页面"""
+        if (
+            page is not self.page
+            or self.pending_restore is not None
+            or type
+            in (
+                QWebEnginePage.NavigationTypeBackForward,
+                QWebEnginePage.NavigationTypeReload,
+            )
+        ):
+            return True
+        # 新的导航使前进栈失效
+        self.swap_forward.clear()
+        if self.chapter_buffer.matches(url):
+            # 不在导航回调中切换页面
+            QTimer.singleShot(0, lambda: self.swap_to_buffer(url))
+            return False
+        return True
+
+    def swap_to_buffer(self, url):
+        """切换到缓冲页面，原页面回收为下一次的缓冲页面"""
+        if not self.chapter_buffer.matches(url):
+            # 导航已被取消，而缓冲页面在此期间被释放：改为正常加载
+            self.page.load(url)
+            return
+        old_page = self.page
+        # 把原页面的历史按顺序并入后退栈，新页面的历史只有当前章节
+        self.push_page_history(old_page, self.swap_history)
+        self.page = self.chapter_buffer.take(old_page)
+        self.browser.setPage(self.page)
+        old_page.triggerAction(QWebEnginePage.Stop)
+        self.chapter_buffer.prefetch(self.page)
+        self.on_page_shown()
+
+    @staticmethod
+    def push_page_history(page, stack, forward=False):
+        """把页面的后退（或前进）历史和当前页按顺序压入栈，当前页在栈顶"""
+        history = page.history()
+        if forward:
+            items = reversed(history.forwardItems(history.count()))
+        else:
+            items = history.backItems(history.count())
+        stack.extend((item.url(), None) for item in items)
+        stack.append((page.url(), page.scrollPosition().y()))
+
+    def restore_from(self, stack):
+        """加载栈顶的页面，加载完成后恢复滚动位置"""
+        self.pending_restore = stack.pop()
+        self.page.load(self.pending_restore[0])
+
+    def can_go_back(self):
+        """是否可以后退"""
+        return self.browser.history().canGoBack() or bool(self.swap_history)
+
+    def can_go_forward(self):
+        """是否可以前进"""
+        return self.browser.history().canGoForward() or bool(self.swap_forward)
+
     def go_back(self):
         """导航回上一页"""
         if self.browser.history().canGoBack():
             self.browser.back()
+        elif self.swap_history:
+            # 缓冲页面没有切换前的历史记录，重新加载上一章并恢复滚动位置；
+            # 当前页面及其前进历史移入前进栈
+            self.push_page_history(self.page, self.swap_forward, forward=True)
+            self.restore_from(self.swap_history)
 
     def go_forward(self):
         """导航到下一页"""
         if self.browser.history().canGoForward():
             self.browser.forward()
+        elif self.swap_forward:
+            self.push_page_history(self.page, self.swap_history)
+            self.restore_from(self.swap_forward)
 
     def reload_page(self):
         """刷新当前页面"""
@@ -709,11 +3329,24 @@ class MinimalBrowser(QWidget):
 
     def closeEvent(self, event):
         """关闭窗口时清理资源"""
-        # 确保所有数据写入磁盘
-        self.profile.setPersistentCookiesPolicy(
-            QWebEngineProfile.ForcePersistentCookies
+        # 停止会访问页面的定时器和后台维护任务
+        self.mouse_timer.stop()
+        self.title_bar.nav_timer.stop()
+        self.chapter_buffer.memory_timer.stop()
+        self.maintenance.shutdown()
+        self.thumbnails.shutdown()
+
+        # 确保所有数据写入磁盘：按顺序释放视图、页面和配置文件
+        # （存储报告只写访问记录和启动时的统计，不重新扫描）
+        self.storage_manager.save()
+        self.local_fonts.save_stats()
+        self.toc_index.close()
+        StorageManager.shutdown_profile(
+            self.browser, [self.page, self.chapter_buffer.page], self.profile
         )
-        self.profile.setPersistentStoragePath(self.profile_path)
+        self.browser = None
+        self.page = None
+        self.profile = None
         super().closeEvent(event)
 
 
@@ -732,13 +3365,201 @@ def log_exception(exctype, value, tb):
     sys.__excepthook__(exctype, value, tb)
 
 
+class Diagnostics:
+    """诊断模式：启动性能分析、内存分配跟踪和慢事件检测
+
+    通过环境变量 ONLINEREADING_DIAGNOSTICS=1 或命令行参数 --diagnostics 开启，
+    未开启时不创建任何对象，也不替换 QApplication，因此没有额外开销。
+    所有输出写入 diagnostics.log（启动分析数据另存为 startup_profile.prof）。
+    """
+
+    ENV_FLAG = "ONLINEREADING_DIAGNOSTICS"
+    ENV_THRESHOLD = "ONLINEREADING_SLOW_EVENT_MS"
+    CLI_FLAG = "--diagnostics"
+    MIN_THRESHOLD_MS = 1
+
+    # 只统计这些窗口类收到的事件
+    WATCHED_CLASSES = (MinimalBrowser, Win11TitleBar)
+
+    def __init__(self, output_dir, threshold_ms=50):
+        self.output_dir = output_dir
+        self.threshold = threshold_ms / 1000.0
+        self.log_path = os.path.join(output_dir, "diagnostics.log")
+        self.profile_path = os.path.join(output_dir, "startup_profile.prof")
+        self.profiler = None
+
+        self.logger = logging.getLogger("diagnostics")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False  # 不写入 browser_error.log
+        handler = logging.FileHandler(self.log_path, encoding="utf-8")
+        handler.setFormatter(
+            logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+        )
+        self.logger.addHandler(handler)
+
+        # 事件类型编号 -> 名称
+        self.event_names = {
+            int(value): name
+            for name, value in vars(QEvent).items()
+            if isinstance(value, QEvent.Type)
+        }
+
+        # 当前正在分发的事件（由主线程写入，看门狗线程读取）
+        self.main_thread_id = threading.get_ident()
+        self.current_event = None  # (开始时间, 事件类型, 接收者类名)
+        self.current_sample = None
+        self.watchdog_stop = threading.Event()
+        self.watchdog = None
+
+    @classmethod
+    def from_environment(cls, argv):
+        """根据环境变量/命令行参数创建诊断对象，未开启时返回 None"""
+        enabled = os.environ.get(cls.ENV_FLAG, "") not in ("", "0")
+        if cls.CLI_FLAG in argv:
+            argv.remove(cls.CLI_FLAG)  # 不传递给 Qt
+            enabled = True
+        if not enabled:
+            return None
+        try:
+            threshold_ms = float(os.environ.get(cls.ENV_THRESHOLD, "50"))
+        except ValueError:
+            threshold_ms = 50
+        # 阈值过小时看门狗线程会空转抢占 GIL，反而影响计时
+        threshold_ms = max(threshold_ms, cls.MIN_THRESHOLD_MS)
+        return cls(os.getcwd(), threshold_ms)
+
+    def start(self):
+        """开始启动阶段的性能分析和内存跟踪"""
+        import cProfile
+        import tracemalloc
+
+        self.logger.info(
+            "Diagnostics enabled, slow event threshold %.0f ms",
+            self.threshold * 1000,
+        )
+        tracemalloc.start(10)
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+        self.watchdog = threading.Thread(
+            target=self.watch_events, name="SlowEventWatchdog", daemon=True
+        )
+        self.watchdog.start()
+
+    def finish_startup(self):
+        """启动完成（事件循环第一次空闲）后停止性能分析并写入结果"""
+        import io
+        import pstats
+
+        if self.profiler is None:
+            return
+        self.profiler.disable()
+        self.profiler.dump_stats(self.profile_path)
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.sort_stats("cumulative").print_stats(30)
+        self.logger.info("Startup profile (%s):\n%s", self.profile_path, stream.getvalue())
+        self.profiler = None
+
+    def finish(self):
+        """退出前写入内存分配统计并停止看门狗"""
+        import tracemalloc
+
+        self.finish_startup()
+        self.watchdog_stop.set()
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            lines = [
+                f"Traced memory: current {current / 1024:.1f} KiB, "
+                f"peak {peak / 1024:.1f} KiB"
+            ]
+            for stat in snapshot.statistics("lineno")[:20]:
+                lines.append(str(stat))
+            self.logger.info("Top allocations:\n%s", "\n".join(lines))
+            tracemalloc.stop()
+
+    def is_watched(self, receiver):
+        return isinstance(receiver, self.WATCHED_CLASSES)
+
+    def begin_event(self, receiver, event):
+        self.current_sample = None
+        self.current_event = (
+            time.perf_counter(),
+            int(event.type()),
+            type(receiver).__name__,
+        )
+
+    def end_event(self):
+        started, event_type, receiver_name = self.current_event
+        self.current_event = None
+        elapsed = time.perf_counter() - started
+        if elapsed < self.threshold:
+            return
+        sample = self.current_sample or "(handler finished before stack sample)\n"
+        self.logger.warning(
+            "Slow event: %s.%s took %.1f ms\nStack sample:\n%s",
+            receiver_name,
+            self.event_names.get(event_type, str(event_type)),
+            elapsed * 1000,
+            sample,
+        )
+
+    def watch_events(self):
+        """看门狗线程：事件处理超过阈值时采样主线程调用栈"""
+        interval = self.threshold / 2
+        while not self.watchdog_stop.wait(interval):
+            current = self.current_event
+            if current is None or self.current_sample is not None:
+                continue
+            if time.perf_counter() - current[0] < self.threshold:
+                continue
+            frame = sys._current_frames().get(self.main_thread_id)
+            if frame is not None and self.current_event is current:
+                self.current_sample = "".join(traceback.format_stack(frame))
+
+
+class DiagnosticsApplication(QApplication):
+    """诊断模式下使用的 QApplication，对关注窗口的事件分发计时"""
+
+    def __init__(self, argv, diagnostics):
+        super().__init__(argv)
+        self.diagnostics = diagnostics
+
+    def notify(self, receiver, event):
+        diagnostics = self.diagnostics
+        # 嵌套事件循环中的事件只计外层
+        if diagnostics.current_event is not None or not diagnostics.is_watched(
+            receiver
+        ):
+            return super().notify(receiver, event)
+        diagnostics.begin_event(receiver, event)
+        try:
+            return super().notify(receiver, event)
+        finally:
+            diagnostics.end_event()
+
+
 if __name__ == "__main__":
     sys.excepthook = log_exception
 
     # 目标网址
     TARGET_URL = "http://zhenghao.x3322.net:38083"
 
-    app = QApplication(sys.argv)
+    # 注册本地字体 URL 方案（必须在创建 QApplication 之前）
+    LocalFonts.register_scheme()
+
+    # 网络采集模式（导出每次导航的 HAR 文件）
+    network_capture = NetworkCapture.enabled_from_environment(sys.argv)
+
+    # 诊断模式（未开启时为 None，不产生任何开销）
+    diagnostics = Diagnostics.from_environment(sys.argv)
+    if diagnostics:
+        diagnostics.start()
+        app = DiagnosticsApplication(sys.argv, diagnostics)
+        app.aboutToQuit.connect(diagnostics.finish)
+    else:
+        app = QApplication(sys.argv)
 
     # 设置应用名称
     app.setApplicationName("OnlineReading")
@@ -762,8 +3583,15 @@ if __name__ == "__main__":
     palette.setColor(QPalette.HighlightedText, QColor(255, 255, 255))
     app.setPalette(palette)
 
+    # 设置应用级样式表（全局只解析一次）
+    app.setStyleSheet(APP_STYLESHEET)
+
     # 创建浏览器窗口
-    browser = MinimalBrowser(TARGET_URL)
+    browser = MinimalBrowser(TARGET_URL, network_capture=network_capture)
     browser.show()
 
+    if diagnostics:
+        # 事件循环开始处理后视为启动完成
+        QTimer.singleShot(0, diagnostics.finish_startup)
+
     sys.exit(app.exec_())
\ No newline at end of file